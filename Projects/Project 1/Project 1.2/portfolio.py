@@ -0,0 +1,161 @@
+"""
+Parallel algorithm portfolio for the flash/nuke planner in searchalgo.py.
+
+Launches several planner configurations at once, one worker process each,
+and returns as soon as one of them produces a proven-optimal plan. If none
+does before the deadline, the cheapest legal plan seen so far is returned.
+The remaining workers are terminated either way.
+
+Usage:
+    python portfolio.py --cases path/to/efficiency/*.json --deadline 30
+    python portfolio.py --maps 10 --rows 40 --cols 40
+"""
+from typing import List, Dict, Any
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+
+import searchalgo
+from verifier import replay, generate_map
+
+#name -> keyword arguments for searchalgo.search
+CONFIGS = {
+    'astar': {'weight': 1.0, 'use_nuke': True},
+    'astar_no_nuke': {'weight': 1.0, 'use_nuke': False},
+    'wastar_2': {'weight': 2.0, 'use_nuke': True},
+    'wastar_5_no_nuke': {'weight': 5.0, 'use_nuke': False},
+}
+
+POLL = 1.0  #seconds between checks for dead workers
+
+
+def is_proven_optimal(dct, config) -> bool:
+    """Plain A* with a consistent heuristic is optimal over the actions it expands."""
+    if config['weight'] != 1.0:
+        return False
+    #without NUKE it is only optimal when NUKE could not have helped anyway
+    return config['use_nuke'] or dct['num_nuke_left'] == 0 or not dct['creeps']
+
+
+def _worker(name, config, dct, results):
+    #always put a result, the parent waits for one per worker
+    start_time = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):  #searchalgo prints its f cost
+            actions = searchalgo.search(dct, **config)
+        error = None
+    except Exception as e:
+        actions = []
+        error = f'{type(e).__name__}: {e}'
+    results.put((name, actions, error, time.perf_counter() - start_time))
+
+
+def portfolio_search(dct, configs=None, deadline=None) -> Dict[str, Any]:
+    """
+    Run every configuration in its own process.
+    Returns the first proven-optimal plan, or the cheapest legal plan once every worker
+    finished or `deadline` seconds passed, together with which configuration produced it.
+    """
+    configs = configs or CONFIGS
+    results = mp.Queue()
+    workers = {
+        name: mp.Process(target=_worker, args=(name, config, dct, results), daemon=True)
+        for name, config in configs.items()
+    }
+    start_time = time.perf_counter()
+    for process in workers.values():
+        process.start()
+
+    best = None
+    finished = []
+    try:
+        while len(finished) < len(workers):
+            timeout = None if deadline is None else deadline - (time.perf_counter() - start_time)
+            if timeout is not None and timeout <= 0:
+                break
+            try:
+                #wake up now and then in case a worker died without putting its result
+                name, actions, error, elapsed = results.get(timeout=POLL if timeout is None else min(timeout, POLL))
+            except queue.Empty:
+                reported = {res['config'] for res in finished}
+                if all(not process.is_alive() for config, process in workers.items() if config not in reported) \
+                        and results.empty():
+                    break
+                continue
+            if error is not None:
+                finished.append({'config': name, 'cost': None, 'legal': False, 'error': error, 'time': round(elapsed, 6)})
+                continue
+            cost, error = replay(dct, actions)
+            finished.append({'config': name, 'cost': cost, 'legal': error is None, 'time': round(elapsed, 6)})
+            if error is not None:
+                continue
+
+            #every configuration exhausts the reachable states before giving up,
+            #so an empty plan proves the map is unsolvable
+            optimal = not actions or is_proven_optimal(dct, configs[name])
+            if best is None or cost < best['cost'] or (optimal and cost == best['cost']):
+                best = {'actions': actions, 'cost': cost, 'config': name, 'optimal': optimal}
+            if optimal:
+                break
+    finally:
+        for process in workers.values():
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    if best is None:
+        best = {'actions': [], 'cost': None, 'config': None, 'optimal': False}
+    best['time'] = round(time.perf_counter() - start_time, 6)
+    best['finished'] = finished
+    return best
+
+
+def search(dct) -> List[int]:
+    """Drop-in replacement for searchalgo.search."""
+    return portfolio_search(dct)['actions']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--cases', nargs='*', default=[], help='test case JSON files to run instead of generated maps')
+    parser.add_argument('--maps', type=int, default=5, help='number of generated maps')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rows', type=int, default=30)
+    parser.add_argument('--cols', type=int, default=30)
+    parser.add_argument('--configs', nargs='*', default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument('--deadline', type=float, default=None, help='seconds per map')
+    parser.add_argument('--out', default=None, help='write the JSON report here instead of stdout')
+    args = parser.parse_args(argv)
+
+    if args.cases:
+        maps = []
+        for path in args.cases:
+            with open(path) as file:
+                maps.append((os.path.basename(path), json.load(file)))
+    else:
+        maps = [(f'seed_{seed}', generate_map(seed, args.rows, args.cols))
+                for seed in range(args.seed, args.seed + args.maps)]
+
+    configs = {name: CONFIGS[name] for name in args.configs}
+    report = []
+    for map_id, dct in maps:
+        result = portfolio_search(dct, configs, args.deadline)
+        result.pop('actions')
+        report.append({'map': map_id, **result})
+
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -141,26 +141,27 @@ def create_grid_visualization(dct, path, total_cost):
 
 
 # Example usage
-dct = {
-    'cols': 20,
-    'rows': 20,
-    'obstacles': [
-        [1, 1], [2, 2], [3, 3], [4, 4], [5, 5],
-        [6, 6], [7, 7], [8, 8], [9, 9], [10, 10],
-        [11, 11], [12, 12], [13, 13], [14, 14], [15, 15], [0, 19],
-        [19, 0], [10, 5], [5, 10]
-    ],
-    'creeps': [
-        [2, 3, 2], [4, 5, 3], [6, 7, 1], [8, 9, 4],
-        [10, 11, 2], [12, 13, 3], [14, 15, 5], [16, 17, 1],
-        [18, 19, 2], [3, 17, 3], [7, 12, 4], [15, 3, 2]
-    ],
-    'start': [0, 0],
-    'goals': [[19, 19]],
-    'num_flash_left': 2,
-    'num_nuke_left': 1
-}
-
-path, total_cost = search(dct)
-create_grid_visualization(dct, path, total_cost)
-print("gay")
+if __name__ == "__main__":
+    dct = {
+        'cols': 20,
+        'rows': 20,
+        'obstacles': [
+            [1, 1], [2, 2], [3, 3], [4, 4], [5, 5],
+            [6, 6], [7, 7], [8, 8], [9, 9], [10, 10],
+            [11, 11], [12, 12], [13, 13], [14, 14], [15, 15], [0, 19],
+            [19, 0], [10, 5], [5, 10]
+        ],
+        'creeps': [
+            [2, 3, 2], [4, 5, 3], [6, 7, 1], [8, 9, 4],
+            [10, 11, 2], [12, 13, 3], [14, 15, 5], [16, 17, 1],
+            [18, 19, 2], [3, 17, 3], [7, 12, 4], [15, 3, 2]
+        ],
+        'start': [0, 0],
+        'goals': [[19, 19]],
+        'num_flash_left': 2,
+        'num_nuke_left': 1
+    }
+
+    path, total_cost = search(dct)
+    create_grid_visualization(dct, path, total_cost)
+    print("gay")
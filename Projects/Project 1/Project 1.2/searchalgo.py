@@ -23,7 +23,12 @@ def apply_nuke(nuke_pos, rows, cols, creeps, obstacles):
                 nuked_positions.add((x, y))
     return nuked_positions
 
-def search(dct) -> list[int]:
+def search(dct, weight=1.0, use_nuke=True) -> list[int]:
+    """
+    A* over (position, flashes left, nuked cells).
+    weight > 1 turns it into weighted A* (faster, no longer optimal) and
+    use_nuke=False drops NUKE from the expanded actions.
+    """
     # Build grid
     rows, cols = dct['rows'], dct['cols']
     start = tuple(dct['start'])
@@ -64,7 +69,7 @@ def search(dct) -> list[int]:
                     new_cost += creeps[new_pos]
                 
                 #calculate heuristic
-                h_cost = min(manhattan_distance(new_pos, goal) for goal in goals)
+                h_cost = weight * min(manhattan_distance(new_pos, goal) for goal in goals)
                 total_cost = g_cost + new_cost + h_cost
 
                 heapq.heappush(pq, (total_cost, g_cost + new_cost, new_pos, actions + [i], flash_left, (nuked, nukes_left)))
@@ -115,7 +120,7 @@ def search(dct) -> list[int]:
                 final_cost = 2 * num_grids_traveled + move_cost  # Post-flash movement cost (2 per grid + creeps)
 
                 #heuristic to calculate estimated distance to the nearest goal
-                h_cost = min(manhattan_distance(move_pos, goal) for goal in goals)
+                h_cost = weight * min(manhattan_distance(move_pos, goal) for goal in goals)
                 total_cost = g_cost + flash_cost + final_cost + h_cost
 
                 #push new state with updated costs and position into the priority queue
@@ -124,13 +129,13 @@ def search(dct) -> list[int]:
                     heapq.heappush(pq, (total_cost, g_cost + flash_cost + final_cost, move_pos, actions + [Action.FLASH.value, i], flash_left - 1, (nuked, nukes_left)))
 
         #Nuke spell
-        if nukes_left > 0:
+        if use_nuke and nukes_left > 0:
             nuked_positions = apply_nuke(current_pos, rows, cols, creeps, obstacles)
             #combine nuke set if got more than 1 nuke available
             updated_nuked = nuked.union(nuked_positions)
 
             #calculate heuristic
-            h_cost = min(manhattan_distance(current_pos, goal) for goal in goals)
+            h_cost = weight * min(manhattan_distance(current_pos, goal) for goal in goals)
             nuke_cost = 50
             total_cost = g_cost + nuke_cost + h_cost
             
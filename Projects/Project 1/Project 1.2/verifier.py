@@ -0,0 +1,308 @@
+"""
+Bulk plan verifier and benchmark harness for the Project 1.2 search.
+
+Generates seeded maps (or loads public test case JSON files), runs every
+registered `search` implementation on them in a process pool, replays each
+returned action list to check that it is legal and to recompute its MP cost,
+and reports cost, expansions and time per map as JSON.
+
+Usage:
+    python verifier.py --maps 50 --seed 0 --workers 4 --out report.json
+    python verifier.py --cases path/to/correctness/*.json
+"""
+from typing import List, Tuple, Dict, Any, Optional
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import contextlib
+import heapq
+import importlib.util
+import io
+import json
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+#name -> file of every search implementation in this folder
+SOLVERS = {
+    'project1.2': 'project1.2.py',
+    'searchalgo': 'searchalgo.py',
+}
+
+#action values, same as the Action enum in both solvers
+UP, DOWN, LEFT, RIGHT, FLASH, NUKE = range(6)
+MOVES = {UP: (-1, 0), DOWN: (1, 0), LEFT: (0, -1), RIGHT: (0, 1)}
+
+MOVE_COST = 4
+FLASH_COST = 10
+FLASH_STEP_COST = 2
+NUKE_COST = 50
+NUKE_RADIUS = 10
+
+
+def manhattan_distance(pos1, pos2):
+    return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
+
+
+def goal_reachable(dct) -> bool:
+    """BFS over free cells. FLASH only slides over free cells, so plain reachability is exact."""
+    rows, cols = dct['rows'], dct['cols']
+    obstacles = set(tuple(obstacle) for obstacle in dct['obstacles'])
+    goals = set(tuple(goal) for goal in dct['goals'])
+    start = tuple(dct['start'])
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        pos = queue.popleft()
+        if pos in goals:
+            return True
+        for dx, dy in MOVES.values():
+            nxt = (pos[0] + dx, pos[1] + dy)
+            if 0 <= nxt[0] < rows and 0 <= nxt[1] < cols and nxt not in obstacles and nxt not in seen:
+                seen.add(nxt)
+                queue.append(nxt)
+    return False
+
+
+def replay(dct, actions) -> Tuple[int, Optional[str]]:
+    """
+    Replay an action list on the map.
+    Returns (MP cost, error) where error is None if the plan is legal and ends on a goal.
+
+    Rules: a move costs 4 plus the creeps on the cell entered. FLASH costs 10 and makes the
+    next move slide until it hits an obstacle or the edge, paying 2 plus creeps per cell.
+    NUKE costs 50 and clears every creep within Manhattan distance 10 of the agent.
+    """
+    rows, cols = dct['rows'], dct['cols']
+    obstacles = set(tuple(obstacle) for obstacle in dct['obstacles'])
+    creeps = {(x, y): num_creeps for x, y, num_creeps in dct['creeps']}
+    goals = set(tuple(goal) for goal in dct['goals'])
+    pos = tuple(dct['start'])
+    flash_left = dct['num_flash_left']
+    nuke_left = dct['num_nuke_left']
+
+    def free(cell):
+        return 0 <= cell[0] < rows and 0 <= cell[1] < cols and cell not in obstacles
+
+    if not free(pos):
+        #starting on an obstacle is unsolvable, only the empty plan is correct
+        return 0, 'plan given although the start is blocked' if actions else None
+
+    cost = 0
+    flashing = False
+    for step, action in enumerate(actions):
+        action = int(getattr(action, 'value', action))  #accept Action members or ints
+        if action in MOVES:
+            dx, dy = MOVES[action]
+            nxt = (pos[0] + dx, pos[1] + dy)
+            if not free(nxt):
+                return cost, f'step {step}: move into obstacle or off the map at {nxt}'
+            if flashing:
+                #slide until blocked
+                while free(nxt):
+                    pos = nxt
+                    cost += FLASH_STEP_COST + creeps.get(pos, 0)
+                    nxt = (pos[0] + dx, pos[1] + dy)
+                flashing = False
+            else:
+                pos = nxt
+                cost += MOVE_COST + creeps.get(pos, 0)
+        elif action == FLASH:
+            if flashing:
+                return cost, f'step {step}: FLASH while a FLASH is pending'
+            if flash_left <= 0:
+                return cost, f'step {step}: no FLASH left'
+            flash_left -= 1
+            flashing = True
+            cost += FLASH_COST
+        elif action == NUKE:
+            if flashing:
+                return cost, f'step {step}: FLASH must be followed by a move'
+            if nuke_left <= 0:
+                return cost, f'step {step}: no NUKE left'
+            nuke_left -= 1
+            cost += NUKE_COST
+            creeps = {cell: num for cell, num in creeps.items() if manhattan_distance(cell, pos) > NUKE_RADIUS}
+        else:
+            return cost, f'step {step}: unknown action {action}'
+
+    if flashing:
+        return cost, 'plan ends with a pending FLASH'
+    if not actions and not goal_reachable(dct):
+        return 0, None  #empty plan is correct for an unsolvable map
+    if pos not in goals:
+        return cost, f'plan ends at {pos}, which is not a goal'
+    return cost, None
+
+
+def generate_map(seed, rows=20, cols=20, obstacle_density=0.2, creep_density=0.15,
+                 max_creeps=50, max_flash=3, max_nuke=2, max_goals=3) -> Dict[str, Any]:
+    """Seeded random map in the same format as the public test cases."""
+    rng = random.Random(seed)
+    cells = [(r, c) for r in range(rows) for c in range(cols)]
+    rng.shuffle(cells)
+    num_obstacles = int(len(cells) * obstacle_density)
+    obstacles = cells[:num_obstacles]
+    free_cells = cells[num_obstacles:]
+    start = free_cells[0]
+    goals = free_cells[1:1 + rng.randint(1, max_goals)]
+    creep_cells = rng.sample(free_cells[1:], int(len(free_cells) * creep_density))
+    return {
+        'rows': rows,
+        'cols': cols,
+        'obstacles': [list(obstacle) for obstacle in obstacles],
+        'creeps': [[r, c, rng.randint(1, max_creeps)] for r, c in creep_cells],
+        'start': list(start),
+        'goals': [list(goal) for goal in goals],
+        'num_flash_left': rng.randint(0, max_flash),
+        'num_nuke_left': rng.randint(0, max_nuke),
+    }
+
+
+class _CountingHeapq:
+    """Stands in for the heapq module inside a solver so heap pops (expansions) can be counted."""
+    heappush = staticmethod(heapq.heappush)
+    heapify = staticmethod(heapq.heapify)
+
+    def __init__(self):
+        self.pops = 0
+
+    def heappop(self, heap):
+        self.pops += 1
+        return heapq.heappop(heap)
+
+
+_loaded = {}
+
+def load_solver(name):
+    """Module of SOLVERS[name], run from its file the first time a pool worker needs it."""
+    if name not in _loaded:
+        spec = importlib.util.spec_from_file_location(name.replace('.', '_'), os.path.join(HERE, SOLVERS[name]))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded[name] = module
+    return _loaded[name]
+
+
+def run_one(task) -> Dict[str, Any]:
+    """Worker: run one solver on one map, then verify the plan."""
+    map_id, solver, dct = task
+    module = load_solver(solver)
+    counter = _CountingHeapq()
+    module.heapq = counter
+
+    error = None
+    claimed_cost = None
+    actions = []
+    start_time = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):  #searchalgo prints its f cost
+            result = module.search(dct)
+    except Exception as e:
+        result = []
+        error = f'{type(e).__name__}: {e}'
+    elapsed = time.perf_counter() - start_time
+
+    #project1.2 returns (actions, cost), searchalgo returns just actions
+    if isinstance(result, tuple):
+        actions, claimed_cost = result
+    elif result:
+        actions = result
+    actions = [int(getattr(action, 'value', action)) for action in actions]
+
+    cost = None
+    found = bool(actions) or tuple(dct['start']) in set(tuple(goal) for goal in dct['goals'])
+    if error is None:
+        cost, error = replay(dct, actions)
+    if error is None and claimed_cost is not None and claimed_cost != cost:
+        error = f'claimed cost {claimed_cost} but replay costs {cost}'
+
+    return {
+        'map': map_id,
+        'solver': solver,
+        'legal': error is None,
+        'error': error,
+        'found': found,
+        'cost': cost,
+        'claimed_cost': claimed_cost,
+        'num_actions': len(actions),
+        'expansions': counter.pops,
+        'time': round(elapsed, 6),
+    }
+
+
+def summarise(results) -> Dict[str, Any]:
+    #best legal cost per map, used to flag plans that are legal but not optimal
+    best = {}
+    for res in results:
+        if res['legal'] and res['found']:
+            best[res['map']] = min(best.get(res['map'], res['cost']), res['cost'])
+
+    summary = {}
+    for res in results:
+        entry = summary.setdefault(res['solver'], {
+            'maps': 0, 'legal': 0, 'found': 0, 'worse_than_best': 0, 'total_time': 0.0, 'total_expansions': 0})
+        entry['maps'] += 1
+        entry['legal'] += res['legal']
+        entry['found'] += res['found']
+        entry['total_time'] += res['time']
+        entry['total_expansions'] += res['expansions']
+        if res['legal'] and res['found'] and res['cost'] > best[res['map']]:
+            entry['worse_than_best'] += 1
+    for entry in summary.values():
+        entry['total_time'] = round(entry['total_time'], 6)
+        entry['mean_time'] = round(entry['total_time'] / entry['maps'], 6) if entry['maps'] else 0.0
+    return summary
+
+
+def run_harness(maps: List[Tuple[str, Dict[str, Any]]], solvers=None, workers=None) -> Dict[str, Any]:
+    """Run every solver on every (map_id, dct) pair and return the JSON-ready report."""
+    solvers = list(solvers or SOLVERS)
+    tasks = [(map_id, solver, dct) for map_id, dct in maps for solver in solvers]
+    if workers == 1:
+        results = [run_one(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_one, tasks, chunksize=max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))))
+    return {'results': results, 'summary': summarise(results)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--maps', type=int, default=20, help='number of generated maps')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first generated map')
+    parser.add_argument('--rows', type=int, default=20)
+    parser.add_argument('--cols', type=int, default=20)
+    parser.add_argument('--obstacle-density', type=float, default=0.2)
+    parser.add_argument('--creep-density', type=float, default=0.15)
+    parser.add_argument('--cases', nargs='*', default=[], help='test case JSON files to run instead of generated maps')
+    parser.add_argument('--solvers', nargs='*', default=list(SOLVERS), choices=list(SOLVERS))
+    parser.add_argument('--workers', type=int, default=None, help='process pool size (1 runs inline)')
+    parser.add_argument('--out', default=None, help='write the JSON report here instead of stdout')
+    args = parser.parse_args(argv)
+
+    if args.cases:
+        maps = []
+        for path in args.cases:
+            with open(path) as file:
+                maps.append((os.path.basename(path), json.load(file)))
+    else:
+        maps = [(f'seed_{seed}', generate_map(seed, args.rows, args.cols, args.obstacle_density, args.creep_density))
+                for seed in range(args.seed, args.seed + args.maps)]
+
+    report = run_harness(maps, args.solvers, args.workers)
+    report['config'] = {key: value for key, value in vars(args).items() if key != 'out'}
+
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
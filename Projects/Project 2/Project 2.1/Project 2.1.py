@@ -1,147 +1,1034 @@
 from typing import List, Dict, Set, Tuple, Any
+from itertools import repeat, product
+from collections import deque, OrderedDict, Counter
+from queue import Empty
+import contextlib
+import copy
 import heapq
+import json
+import multiprocessing
+import random
+import time
+
+#byte 0 -> '0', any other byte -> '1', used to turn a row of constraint results into a bitset
+BIT_CHARS = bytes([ord('0')] + [ord('1')] * 255)
+
+#marks a value that was never found, values themselves may be None or False
+MISSING = object()
+
+#solve_parallel's timeout on each results.get, after which it checks that some worker is still alive
+POLL = 1.0
+
+#steps a value stays tabu in min_conflicts after its variable left it
+TABU_TENURE = 10
+
+def _row_bytes(constraint_func, args):
+    try:
+        return bytes(map(constraint_func, *args))
+    except (TypeError, ValueError):  #lambda returned something that is not a bool / small int
+        return bytes(map(bool, map(constraint_func, *args)))
+
+def compile_constraint(constraint_func, values1, values2):
+    """
+    Evaluate constraint_func once over values1 x values2.
+    Returns (forward, backward) support masks:
+    bit j of forward[i] is set iff constraint_func(values1[i], values2[j]) holds,
+    bit i of backward[j] is set for the same pairs.
+    """
+    if not values1 or not values2:
+        return [0] * len(values1), [0] * len(values2)
+    rows = [_row_bytes(constraint_func, (repeat(value1), values2)) for value1 in values1]
+    #reverse so index 0 ends up as the lowest bit
+    forward = [int(row[::-1].translate(BIT_CHARS), 2) for row in rows]
+    backward = [int(bytes(column[::-1]).translate(BIT_CHARS), 2) for column in zip(*rows)]
+    return forward, backward
+
+#indices of the set bits, lowest first
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class NogoodStore:
+    """
+    Learned nogoods: partial assignments, as frozensets of (var, value) pairs, that cannot be
+    extended to a solution. Only nogoods of at most max_size pairs are kept, and the least
+    recently used one is evicted once capacity is reached.
+    """
+    def __init__(self, max_size=4, capacity=10000):
+        self.max_size = max_size
+        self.capacity = capacity
+        self.nogoods = OrderedDict()  #nogood -> None, oldest first
+        self.watches = {}  #(var, value) -> set of nogoods containing it
+
+    def __len__(self):
+        return len(self.nogoods)
+
+    def add(self, nogood):
+        if not nogood or len(nogood) > self.max_size or nogood in self.nogoods:
+            return
+        self.nogoods[nogood] = None
+        for literal in nogood:
+            self.watches.setdefault(literal, set()).add(nogood)
+        if len(self.nogoods) > self.capacity:
+            evicted, _ = self.nogoods.popitem(last=False)
+            for literal in evicted:
+                self.watches[literal].discard(evicted)
+
+    #the stored nogood that variable = value would complete under assignments, or None
+    def violated(self, variable, value, assignments):
+        for nogood in self.watches.get((variable, value), ()):
+            if all(var == variable or (var in assignments and assignments[var] == val) for var, val in nogood):
+                self.nogoods.move_to_end(nogood)
+                return nogood
+        return None
+
+class SolverStats:
+    """
+    Opt-in search statistics, pass one to solve_CSP (or csp) as stats=.
+    Counts nodes, backtracks (dead ends), support checks and domain wipeouts per constraint and the
+    maximum depth, and times the lambdas (compile), propagation and each heuristic phase.
+    With sample_every=k only every k-th call of a phase is timed and has its checks counted, and
+    those figures are scaled by k, which keeps the overhead to a few percent.
+    Worker processes (workers > 1) do not report back, only the parent's search is counted.
+    """
+    PHASES = ('choose_variable', 'rank_values', 'forward_check')
+
+    def __init__(self, sample_every=1):
+        self.sample_every = sample_every
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.lambda_calls = 0
+        self.checks = Counter()  #(var, neighbor) -> support checks
+        self.wipeouts = Counter()  #(var, neighbor) -> domains the constraint wiped out
+        self.calls = Counter()  #phase -> calls
+        self.times = Counter()  #phase -> seconds (estimated when sampling)
+
+    #replace the heuristic methods of one csp instance by timed wrappers
+    def instrument(self, csp):
+        csp.stats = self
+        for phase in self.PHASES:
+            setattr(csp, phase, self._timed(csp, phase, getattr(type(csp), phase)))
+        bump = type(csp).bump
+        def counted_bump(x, y):
+            self.wipeouts[(x, y)] += 1
+            bump(csp, x, y)
+        csp.bump = counted_bump
+
+    #wrap a constraint so every call of it counts towards lambda_calls
+    def count_calls(self, constraint_func):
+        def counted(x, y):
+            self.lambda_calls += 1
+            return constraint_func(x, y)
+        return counted
+
+    def _timed(self, csp, phase, method):
+        calls, times, every = self.calls, self.times, self.sample_every
+        def timed(*args):
+            calls[phase] += 1
+            if phase == 'forward_check' and len(csp.assignments) > self.max_depth:
+                self.max_depth = len(csp.assignments)
+            if calls[phase] % every:
+                return method(csp, *args)
+            start = time.perf_counter()
+            result = method(csp, *args)
+            times[phase] += (time.perf_counter() - start) * every
+            if phase == 'forward_check':
+                #one check per unassigned neighbor looked at, forward checking stops at a wipeout
+                variable = args[0]
+                for neighbor in csp.supports[variable]:
+                    if neighbor not in csp.assignments:
+                        self.checks[(variable, neighbor)] += every
+                        if not result and neighbor == csp.wipeout:
+                            break
+            return result
+        return timed
+
+    @contextlib.contextmanager
+    def timer(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.calls[phase] += 1
+            self.times[phase] += time.perf_counter() - start
+
+    #add the counters of a csp that is done searching
+    def absorb(self, csp):
+        self.nodes += csp.nodes
+        self.backtracks += csp.backtracks
+
+    def as_dict(self):
+        return {
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'max_depth': self.max_depth,
+            'lambda_calls': self.lambda_calls,
+            'sample_every': self.sample_every,
+            'wipeouts': sum(self.wipeouts.values()),
+            'calls': dict(self.calls),
+            'times': {phase: round(seconds, 6) for phase, seconds in self.times.items()},
+            'checks': {f'{x},{y}': count for (x, y), count in self.checks.most_common()},
+            'wipeouts_by_constraint': {f'{x},{y}': count for (x, y), count in self.wipeouts.most_common()},
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), **kwargs)
+
+#time a phase if stats are being collected
+def timed(stats, phase):
+    return stats.timer(phase) if stats is not None else contextlib.nullcontext()
+
+#raised inside a search once it used up its node budget, see restart_search
+class Restart(Exception):
+    pass
 
 class csp:
-    def __init__(self, domain_values, constraint_rules):
-        self.domain_values = domain_values
+    def __init__(self, domain_values, constraint_rules, mac=False, lcv_min_domain=2, cbj=False,
+                 ordering='mrv', restarts=None, stats=None):
         self.constraint_rules = constraint_rules
+        self.mac = mac  #maintain arc consistency during search instead of plain forward checking
+        self.lcv_min_domain = lcv_min_domain  #smaller domains skip LCV scoring and go in value order
+        #conflict-directed backjumping: remember which assignments pruned each domain, learn nogoods
+        self.cbj = cbj
+        self.nogoods = NogoodStore() if cbj else None
+        self.wipeout = None  #variable whose domain emptied in the last failed propagation
+        self.classes = None  #interchangeable value groups once bucket_values ran
+        #'mrv': smallest domain, then most unassigned neighbors. 'domwdeg': smallest domain size over
+        #weighted degree, where a constraint's weight counts the wipeouts it caused
+        self.ordering = ordering
+        self.restarts = restarts  #initial node cutoff for restart_search, None searches without restarts
+        self.nodes = 0  #values tried so far
+        self.backtracks = 0  #variables that ran out of values
+        self.node_limit = None
+        self.stats = None
+        if stats is not None:
+            stats.instrument(self)
         self.variables = list(domain_values.keys())
+        #fixed value order per variable, duplicates dropped, value -> index for the bitsets
+        self.values = {var: list(dict.fromkeys(domain)) for var, domain in domain_values.items()}
+        with timed(self.stats, 'compile'):
+            self.drop_unsupported()
+            self.value_index = {var: {value: i for i, value in enumerate(values)} for var, values in self.values.items()}
+            self.compile_constraints()
+        #domains are bitsets over value indices, bit i set = values[var][i] still allowed
+        self.domains = {var: (1 << len(values)) - 1 for var, values in self.values.items()}
+        self.assignments = {}
+        #every assignment and domain change, as (var, previous mask, reason) or (var, None, None) for an
+        #assignment. reason is the tuple of assigned variables that caused the pruning (kept only with cbj)
+        self.trail = []
+        self.pruned_by = {var: [] for var in self.variables}
+
+        #live ordering state: total weight of the constraints to unassigned neighbors (every weight
+        #stays 1 under mrv, so that is the plain degree), and a heap of (key, var) entries that goes
+        #stale lazily, an entry only counts if its key still matches order_key(var)
+        self.position = {var: i for i, var in enumerate(self.variables)}
+        self.tiebreak = dict(self.position)  #shuffled on restarts
+        self.weights = {var: dict.fromkeys(self.supports[var], 1) for var in self.variables}
+        self.degree = {var: len(self.supports[var]) for var in self.variables}
+        self.rebuild_order()
+
+    #arc consistency on the raw constraints before compiling, stopping at the first support of each
+    #value instead of evaluating whole rows. The support found is kept as a residue, and a later
+    #revision of the same arc only rescans for values whose residue has been dropped since.
+    #A value without support is in no solution, so it is dropped from values for good and never gets
+    #a row in the support tables
+    def drop_unsupported(self):
+        values = self.values
+        alive = {var: set(domain) for var, domain in values.items()}
+        residues = {}  #(var, neighbor) -> {value: a value of neighbor supporting it}
+        queue = deque((var, neighbor) for var, rules in self.constraint_rules.items() for neighbor in rules)
+        queued = set(queue)
+        while queue:
+            #newest arc first: a pruning is followed down to the variables it affects while their
+            #neighbors are small, instead of every arc being scanned against full domains first
+            var, neighbor = queue.pop()
+            queued.discard((var, neighbor))
+            constraint_func, is_forward = self.constraint_rules[var][neighbor]
+            if self.stats is not None:
+                constraint_func = self.stats.count_calls(constraint_func)
+            others, still_there = values[neighbor], alive[neighbor]
+            residue = residues.setdefault((var, neighbor), {})
+            kept = []
+            for value in values[var]:
+                if residue.get(value, MISSING) in still_there:
+                    kept.append(value)
+                    continue
+                if is_forward:
+                    support = next((other for other in others if constraint_func(value, other)), MISSING)
+                else:
+                    support = next((other for other in others if constraint_func(other, value)), MISSING)
+                if support is not MISSING:
+                    residue[value] = support
+                    kept.append(value)
+            if len(kept) < len(values[var]):
+                values[var] = kept
+                alive[var] = set(kept)
+                for z in self.constraint_rules[var]:
+                    if z != neighbor and (z, var) not in queued:
+                        queue.append((z, var))
+                        queued.add((z, var))
+
+    #evaluate every constraint once over the values left, afterwards every check is a bit lookup
+    def compile_constraints(self):
+        #supports[var][neighbor][i] = bitset over neighbor's values compatible with var = values[var][i]
+        self.supports = {var: {} for var in self.variables}
+        for var, rules in self.constraint_rules.items():
+            for neighbor, (constraint_func, is_forward) in rules.items():
+                if is_forward:
+                    forward, backward = compile_constraint(constraint_func, self.values[var], self.values[neighbor])
+                    if self.stats is not None:
+                        self.stats.lambda_calls += len(self.values[var]) * len(self.values[neighbor])
+                    self.supports[var][neighbor] = forward
+                    self.supports[neighbor][var] = backward
+
+    #a csp over a subset of the variables that no constraint leaves (e.g. a connected component),
+    #sharing the compiled tables and starting from the current domains
+    def subproblem(self, variables):
+        sub = copy.copy(self)
+        sub.variables = list(variables)
+        sub.domains = {var: self.domains[var] for var in variables}
+        sub.assignments = {}
+        sub.trail = []
+        sub.pruned_by = {var: [] for var in variables}
+        sub.nogoods = NogoodStore() if self.cbj else None
+        sub.nodes = 0
+        sub.backtracks = 0
+        sub.weights = {var: dict(self.weights[var]) for var in variables}
+        sub.degree = {var: sum(sub.weights[var].values()) for var in variables}
+        sub.rebuild_order()
+        if self.stats is not None:
+            self.stats.instrument(sub)
+        return sub
+
+    #group values that every constraint treats the same (identical support rows towards every
+    #neighbor's domain) and keep only one representative of each group in the domain. Swapping a value
+    #for another of its group never breaks a constraint, so no solution is lost.
+    #classes[var] maps a representative's index to the bitset of its whole group
+    def bucket_values(self):
+        self.classes = {}
+        for var in self.variables:
+            groups = {}
+            neighbors = [(rows, self.domains[neighbor]) for neighbor, rows in self.supports[var].items()]
+            for i in iter_bits(self.domains[var]):
+                signature = tuple(rows[i] & neighbor_domain for rows, neighbor_domain in neighbors)
+                if signature in groups:
+                    groups[signature] |= 1 << i
+                else:
+                    groups[signature] = 1 << i
+            #the lowest index of each group represents it
+            self.classes[var] = {(group & -group).bit_length() - 1: group for group in groups.values()}
+            representatives = sum(1 << i for i in self.classes[var])
+            if representatives != self.domains[var]:
+                self.set_domain(var, representatives)
+
+    #how many concrete values the values in mask stand for
+    def weight(self, variable, mask):
+        if self.classes is None:
+            return mask.bit_count()
+        classes = self.classes[variable]
+        return sum(classes[i].bit_count() for i in iter_bits(mask))
+
+    #every concrete solution that a solution over class representatives stands for
+    def expand(self, solution):
+        if self.classes is None:
+            yield solution
+            return
+        members = []
+        for var, value in solution.items():
+            group = self.classes[var][self.value_index[var][value]]
+            members.append([self.values[var][i] for i in iter_bits(group)])
+        for combo in product(*members):
+            yield dict(zip(solution, combo))
+
+    #values currently in a variable's domain
+    def domain(self, variable):
+        values = self.values[variable]
+        return [values[i] for i in iter_bits(self.domains[variable])]
+
+    #narrow a domain, the old bitset goes on the trail
+    def set_domain(self, variable, mask, reason=None):
+        self.trail.append((variable, self.domains[variable], reason))
+        self.domains[variable] = mask
+        if reason is not None:
+            self.pruned_by[variable].append(reason)
+        self.reorder(variable)
+
+    def assign(self, variable, value):
+        self.set_domain(variable, 1 << self.value_index[variable][value])
+        self.trail.append((variable, None, None))
+        self.assignments[variable] = value
+        weights = self.weights[variable]
+        for neighbor in self.supports[variable]:
+            self.degree[neighbor] -= weights[neighbor]
+            self.reorder(neighbor)
+
+    #undo everything recorded after the trail had length `mark`
+    def undo(self, mark):
+        trail = self.trail
+        while len(trail) > mark:
+            variable, mask, reason = trail.pop()
+            if reason is not None:
+                self.pruned_by[variable].pop()
+            if mask is None:
+                del self.assignments[variable]
+                weights = self.weights[variable]
+                for neighbor in self.supports[variable]:
+                    self.degree[neighbor] += weights[neighbor]
+                    self.reorder(neighbor)
+            else:
+                self.domains[variable] = mask
+            self.reorder(variable)
+
+    #assigned variables whose propagation removed values from variable's domain
+    def culprits(self, variable):
+        return {culprit for reason in self.pruned_by[variable] for culprit in reason}
+
+    #the constraint between x and y just wiped out a domain, under domwdeg it weighs one more
+    def bump(self, x, y):
+        if self.ordering != 'domwdeg':
+            return
+        self.weights[x][y] += 1
+        self.weights[y][x] += 1
+        #degree only counts constraints whose other end is unassigned, undo adds the new weight later
+        for var, other in ((x, y), (y, x)):
+            if other not in self.assignments:
+                self.degree[var] += 1
+                self.reorder(var)
+
+    #MRV first, then most unassigned neighbors (degree), then declaration order.
+    #domwdeg: domain size / weighted degree, variables without unassigned neighbors last
+    def order_key(self, variable):
+        if self.ordering == 'domwdeg':
+            degree = self.degree[variable]
+            return (self.domains[variable].bit_count() / degree if degree else float('inf'), self.tiebreak[variable])
+        return (self.domains[variable].bit_count(), -self.degree[variable], self.tiebreak[variable])
+
+    def rebuild_order(self):
+        self.order_heap = [(self.order_key(var), var) for var in self.variables if var not in self.assignments]
+        heapq.heapify(self.order_heap)
+        self.reordered = set()
+
+    #variable's key changed, its old heap entry goes stale. The fresh entry is pushed by the next
+    #choose_variable, so a variable that changes many times in between (forward checking one value
+    #after another, undoing each) is pushed once
+    def reorder(self, variable):
+        self.reordered.add(variable)
 
     #check if assigning a value to a variable is valid
     def is_valid(self, variable, value, current_assignments):
         if variable not in self.constraint_rules:
             return True  #no constraint so valid
-        
-        for neighbor, constraint_details in self.constraint_rules[variable].items():
-            constraint_func, is_forward = constraint_details
+
+        i = self.value_index[variable][value]
+        for neighbor, masks in self.supports[variable].items():
             if neighbor in current_assignments:
-                if is_forward and not constraint_func(value, current_assignments[neighbor]):
-                    return False
-                if not is_forward and not constraint_func(current_assignments[neighbor], value):
+                if not masks[i] >> self.value_index[neighbor][current_assignments[neighbor]] & 1:
                     return False
         return True
     
     # Select the next variable to assign based on MRV and Degree heuristics
+    # forward checking keeps every domain consistent with the assignments, so the MRV count is
+    # just the domain size and the best variable sits on top of the order heap
     def choose_variable(self, current_assignments):
-        #compute MRV
-        mrv_info = {} #HASHMAP BABEH
-        for var in self.domain_values:
+        heap = self.order_heap
+        for var in self.reordered:
             if var not in current_assignments:
-                remaining_values = sum(self.is_valid(var, val, current_assignments) for val in self.domain_values[var])
-                mrv_info[var] = remaining_values
-
-        #get variables with the fewest remaining values
-        min_remaining = min(mrv_info.values())
-        candidates = [var for var, count in mrv_info.items() if count == min_remaining]
-
-       
-        if len(candidates) == 1:
-            return candidates[0]
-        
-        #if there are multiple variables with the same MRV, apply degree heuristic
-        else:
-            degree_info = {}
-            for var in candidates:
-                degree = sum(1 for neighbor in self.constraint_rules[var] if neighbor not in current_assignments)
-                degree_info[var] = degree
-            return max(degree_info, key=degree_info.get)
+                heapq.heappush(heap, (self.order_key(var), var))
+        self.reordered.clear()
+        #stale entries pile up on long searches, start over once they dominate
+        if len(heap) > 8 * len(self.variables) + 64:
+            self.rebuild_order()
+            heap = self.order_heap
+        while True:
+            key, var = heap[0]
+            if var not in current_assignments and key == self.order_key(var):
+                return var
+            heapq.heappop(heap)  #stale entry
         
     # Sort values based on the Least Constraining Value (LCV) heuristic
+    # neighbor domains are already consistent with the assignments, so the number of neighbor values
+    # a candidate leaves is the popcount of its support bitset ANDed with the neighbor's domain.
+    # A candidate that leaves some neighbor nothing would only fail forward checking, so it is left
+    # out, except with cbj, where trying it is what records the assignments to blame for it
     def rank_values(self, variable, current_assignments):
-        heap = []
-        for candidate_value in self.domain_values[variable]:
-            temp_assignments = current_assignments.copy()
-            temp_assignments[variable] = candidate_value
-            lcv_score = 0
-            
-            for neighbor in self.constraint_rules[variable]:
-                if neighbor not in temp_assignments:
-                    for neighbor_value in self.domain_values[neighbor]:
-                        if self.is_valid(neighbor, neighbor_value, temp_assignments):
-                            lcv_score += 1
-
-            #somehow faster than using a list and sort
-            heapq.heappush(heap, (-lcv_score, candidate_value))
-        # Extract the values from the heap in reverse order of LCV (i.e., most constraining first)
-        return [heapq.heappop(heap)[1] for _ in range(len(heap))]
+        values = self.values[variable]
+        domain = self.domains[variable]
+        neighbors = [
+            (masks, self.domains[neighbor]) for neighbor, masks in self.supports[variable].items()
+            if neighbor not in current_assignments
+        ]
+        if not neighbors or domain.bit_count() < self.lcv_min_domain:
+            return sorted(values[i] for i in iter_bits(domain))
+
+        scored = []
+        for i in iter_bits(domain):
+            left = [(masks[i] & neighbor_domain).bit_count() for masks, neighbor_domain in neighbors]
+            if self.cbj or 0 not in left:
+                scored.append((-sum(left), values[i]))
+        # most remaining neighbor values first, ties by value
+        scored.sort()
+        return [value for _, value in scored]
     
-    #perform forward checking to reduce the domain of unassigned neighbors
-    def forward_check(self, variable, value, current_assignments):
-        backup_domain = {}
-        for neighbor, constraint_details in self.constraint_rules[variable].items():
-            constraint_func, is_forward = constraint_details
-            if neighbor not in current_assignments:
-                backup_domain[neighbor] = self.domain_values[neighbor]
-                pruned_domain = [
-                    neighbor_value for neighbor_value in self.domain_values[neighbor]
-                    if (is_forward and constraint_func(value, neighbor_value)) or
-                    (not is_forward and constraint_func(neighbor_value, value))
-                ]
-                self.domain_values[neighbor] = pruned_domain
+    #perform forward checking to reduce the domain of unassigned neighbors, changes go on the trail
+    def forward_check(self, variable, value):
+        i = self.value_index[variable][value]
+        reason = (variable,) if self.cbj else None
+        for neighbor, masks in self.supports[variable].items():
+            if neighbor not in self.assignments:
+                domain = self.domains[neighbor]
+                pruned_domain = domain & masks[i]
+                if pruned_domain != domain:
+                    self.set_domain(neighbor, pruned_domain, reason)
 
                 #if any neighbor's domain becomes empty, forward checking fails
                 if not pruned_domain:
-                    return False, backup_domain
-        return True, backup_domain
-    
-    #restore the domains after backtracking
-    def restore_domains(self, backup_domain):
-        for var, domain in backup_domain.items():
-            self.domain_values[var] = domain
+                    self.wipeout = neighbor
+                    self.bump(neighbor, variable)
+                    return False
+        return True
+
+#remove the values of x that have no support left in y, returns True if x's domain changed
+def revise(csp, x, y):
+    if csp.stats is not None:
+        csp.stats.checks[(x, y)] += 1
+    masks, y_mask = csp.supports[x][y], csp.domains[y]
+    domain = csp.domains[x]
+    revised = domain
+    for i in iter_bits(domain):
+        if not masks[i] & y_mask:
+            revised ^= 1 << i
+    if revised == domain:
+        return False
+    #under MAC the removal follows from every assignment so far
+    csp.set_domain(x, revised, tuple(csp.assignments) if csp.cbj else None)
+    return True
+
+def ac3(csp, arcs=None):
+    """
+    AC-3 over the compiled support tables, runs until no arc removes anything.
+    arcs: (x, y) pairs meaning "revise x against y", every arc if not given.
+    Assigned variables are never revised. Changes go on the csp's trail.
+    Returns False as soon as a domain is wiped out.
 
-#prune based on constraints -> reduces intial domain
+    Last-support pointers (AC-2001) are not needed here: a support check is a
+    single AND of the value's support bitset with the neighbor's domain.
+    """
+    assignments = csp.assignments
+    if arcs is None:
+        arcs = [(x, y) for x in csp.variables for y in csp.supports[x]]
+    queue = deque(arc for arc in arcs if arc[0] not in assignments)
+    queued = set(queue)
+    while queue:
+        x, y = queue.popleft()
+        queued.discard((x, y))
+        if revise(csp, x, y):
+            if not csp.domains[x]:
+                csp.wipeout = x
+                csp.bump(x, y)
+                return False
+            #x lost values, so everything that relied on x has to be rechecked
+            for z in csp.supports[x]:
+                if z != y and z not in assignments and (z, x) not in queued:
+                    queue.append((z, x))
+                    queued.add((z, x))
+    return True
+
+#prune based on constraints -> reduces intial domain, runs arc consistency to a fixpoint
 def prune_invalid_domains(csp):
-    for variable in csp.variables:
-        if variable not in csp.constraint_rules:
+    return ac3(csp)
+
+#assign value to variable and propagate. Returns None if that worked, otherwise the set of assigned
+#variables to blame (worked out only with csp.cbj). The caller undoes the trail either way
+def try_value(csp, variable, value):
+    csp.nodes += 1
+    if csp.node_limit is not None and csp.nodes > csp.node_limit:
+        raise Restart
+    if not csp.is_valid(variable, value, csp.assignments):
+        return {neighbor for neighbor in csp.supports[variable] if neighbor in csp.assignments}
+    if csp.nogoods is not None:
+        nogood = csp.nogoods.violated(variable, value, csp.assignments)
+        if nogood is not None:
+            return {var for var, _ in nogood if var != variable}
+    mark = len(csp.trail)
+    csp.assign(variable, value)
+
+    #perform forward checking
+    success = csp.forward_check(variable, value)
+    if success and csp.mac:
+        #propagate the pruned neighbors further (MAC)
+        pruned = {var for var, mask, _ in csp.trail[mark:] if mask is not None and var != variable}
+        success = ac3(csp, [(z, neighbor) for neighbor in pruned for z in csp.supports[neighbor]])
+    if success:
+        return None
+    if not csp.cbj:
+        return set()
+    #the wiped out domain lost its values to these assignments
+    conflict = csp.culprits(csp.wipeout)
+    conflict.discard(variable)
+    return conflict
+
+#every solution reachable from the csp's current state, one at a time (chronological backtracking).
+#explicit stack so depth is not bounded by the recursion limit, assignments and domains live in csp
+#and are rolled back through its trail
+def solutions(csp):
+    stack = []  #(variable, its remaining ranked values, trail length before it was assigned)
+    while True:
+        #all assigned, hand out a copy and keep searching from the deepest variable
+        if len(csp.assignments) == len(csp.variables):
+            yield dict(csp.assignments)
+        else:
+            #choose the next variable to assign, LCV heuristic to rank values
+            var_to_assign = csp.choose_variable(csp.assignments)
+            stack.append((var_to_assign, iter(csp.rank_values(var_to_assign, csp.assignments)), len(csp.trail)))
+
+        #take the next value of the deepest variable, going back up when one runs out
+        while stack:
+            variable, values, mark = stack[-1]
+            csp.undo(mark)
+            for value in values:
+                if try_value(csp, variable, value) is None:
+                    break
+                csp.undo(mark)
+            else:
+                stack.pop()
+                csp.backtracks += 1
+                continue
+            break
+        else:
+            return #no more solutions
+
+#first solution or None, the csp is left holding it
+def backtrack(csp):
+    return next(solutions(csp), None)
+
+#backtracking with conflict-directed backjumping (FC-CBJ): every variable on the stack collects the
+#earlier variables its failures depend on, and when it runs out of values the search jumps straight
+#back to the most recent of them. Each such conflict is also learned as a nogood.
+def backjump(csp):
+    stack = []  #(variable, its remaining ranked values, trail length before it was assigned)
+    conflicts = {}  #variable on the stack -> earlier variables blamed for its failed values
+    while True:
+        if len(csp.assignments) == len(csp.variables):
+            return dict(csp.assignments)
+        var_to_assign = csp.choose_variable(csp.assignments)
+        stack.append((var_to_assign, iter(csp.rank_values(var_to_assign, csp.assignments)), len(csp.trail)))
+        conflicts[var_to_assign] = set()
+
+        while stack:
+            variable, values, mark = stack[-1]
+            for value in values:
+                culprits = try_value(csp, variable, value)
+                if culprits is None:
+                    break
+                conflicts[variable] |= culprits
+                csp.undo(mark)
+            else:
+                csp.undo(mark)
+                stack.pop()
+                csp.backtracks += 1
+                #values removed from the domain by earlier assignments count as failures too
+                conflict = conflicts.pop(variable) | csp.culprits(variable)
+                conflict.discard(variable)
+                if not conflict:
+                    return None #failed without depending on any assignment: no solution
+                csp.nogoods.add(frozenset((var, csp.assignments[var]) for var in conflict))
+
+                #skip every variable that had nothing to do with the failure
+                while stack and stack[-1][0] not in conflict:
+                    skipped, _, skipped_mark = stack.pop()
+                    conflicts.pop(skipped)
+                    csp.undo(skipped_mark)
+                if not stack:
+                    return None #only assignments made before this search are to blame
+                culprit = stack[-1][0]
+                conflicts[culprit] |= conflict - {culprit}
+                csp.undo(stack[-1][2])
+                continue
+            break
+        else:
+            return None
+
+
+#backtracking or backjumping from the csp's current state
+def tree_search(csp):
+    return backjump(csp) if csp.cbj else backtrack(csp)
+
+def restart_search(csp, cutoff=100, growth=1.5, seed=0):
+    """
+    Search with restarts: give up after `cutoff` more nodes, roll back to the starting state and
+    try again with a cutoff `growth` times larger and reshuffled ties, until a run finishes.
+    Constraint weights (domwdeg) and learned nogoods (cbj) carry over from one run to the next,
+    so later runs start with the variables that caused trouble. The growing cutoff keeps it complete.
+    """
+    rng = random.Random(seed)
+    mark = len(csp.trail)
+    while True:
+        csp.node_limit = csp.nodes + int(cutoff)
+        try:
+            return tree_search(csp)
+        except Restart:
+            csp.undo(mark)
+            cutoff *= growth
+            order = list(csp.tiebreak)
+            rng.shuffle(order)
+            csp.tiebreak = {var: i for i, var in enumerate(order)}
+            csp.rebuild_order()
+        finally:
+            csp.node_limit = None
+
+#run whichever search the csp was set up for from its current state
+def search(csp):
+    if csp.restarts is not None:
+        return restart_search(csp, csp.restarts)
+    return tree_search(csp)
+
+def min_conflicts(csp, max_steps=100000, time_limit=None, tabu_tenure=TABU_TENURE, walk=0.02, seed=0):
+    """
+    Min-conflicts local search over the csp's current domains, for large satisfiable problems where
+    a systematic search is overkill. Starts from a greedy complete assignment, then repeatedly makes the
+    move (a conflicted variable to another value) that leaves the fewest conflicts, ties broken at
+    random, even when that is uphill. A value a variable just left is tabu for tabu_tenure steps unless
+    taking it beats the fewest conflicts seen so far, and with probability walk a random conflicted
+    variable goes to a random value instead, both to get off plateaus and out of local minima.
+    Returns a solution, or None once max_steps or time_limit (seconds) run out, which does not mean
+    there is none. The csp itself is not changed.
+    """
+    rng = random.Random(seed)
+    variables = csp.variables
+    supports = csp.supports
+    choices = {var: list(iter_bits(csp.domains[var])) for var in variables}
+    if not all(choices.values()):
+        return None
+    #greedy start: each variable in turn takes a value with the fewest conflicts with those before it
+    current = {}  #value indices
+    for var in variables:
+        counts = {i: 0 for i in choices[var]}
+        for neighbor, rows in supports[var].items():
+            if neighbor in current:
+                j = current[neighbor]
+                for i in counts:
+                    if not rows[i] >> j & 1:
+                        counts[i] += 1
+        best = min(counts.values())
+        current[var] = rng.choice([i for i, count in counts.items() if count == best])
+
+    #conflicts[var][i] = neighbors whose current value rules out values[var][i], kept up to date on every move
+    conflicts = {}
+    for var in variables:
+        counts = [0] * len(csp.values[var])
+        for neighbor, rows in supports[var].items():
+            j = current[neighbor]
+            for i in choices[var]:
+                if not rows[i] >> j & 1:
+                    counts[i] += 1
+        conflicts[var] = counts
+    #conflicted variables as a list plus positions, for O(1) random picks, adds and removes
+    conflicted = [var for var in variables if conflicts[var][current[var]]]
+    where = {var: k for k, var in enumerate(conflicted)}
+    #violated constraints, and the fewest seen so far (a tabu move that beats that is allowed anyway)
+    total = sum(conflicts[var][current[var]] for var in variables) // 2
+    best_total = total
+
+    def update(var):
+        if conflicts[var][current[var]]:
+            if var not in where:
+                where[var] = len(conflicted)
+                conflicted.append(var)
+        elif var in where:
+            k = where.pop(var)
+            last = conflicted.pop()
+            if last != var:
+                conflicted[k] = last
+                where[last] = k
+
+    tabu = {}  #(var, value index) -> first step it is allowed again
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    for step in range(max_steps):
+        if not conflicted:
+            return {var: csp.values[var][current[var]] for var in variables}
+        if deadline is not None and not step & 255 and time.perf_counter() > deadline:
+            return None
+
+        if rng.random() < walk:
+            var = rng.choice(conflicted)
+            candidates = [i for i in choices[var] if i != current[var]]
+            if not candidates:
+                continue  #single value, only its neighbors can move
+            new = rng.choice(candidates)
+        else:
+            #best move over all conflicted variables, a tabu one only if it beats the best total so far
+            best = None
+            moves = []
+            for var in conflicted:
+                counts = conflicts[var]
+                at = current[var]
+                for i in choices[var]:
+                    if i == at:
+                        continue
+                    delta = counts[i] - counts[at]
+                    if tabu.get((var, i), 0) > step and total + delta >= best_total:
+                        continue
+                    if best is None or delta < best:
+                        best = delta
+                        moves = [(var, i)]
+                    elif delta == best:
+                        moves.append((var, i))
+            if not moves:
+                continue  #every move is tabu, wait for one to expire
+            var, new = rng.choice(moves)
+        old = current[var]
+        counts = conflicts[var]
+        current[var] = new
+        total += counts[new] - counts[old]
+        best_total = min(best_total, total)
+        tabu[(var, old)] = step + tabu_tenure + 1  #not allowed back for the next tabu_tenure steps
+        for neighbor in supports[var]:
+            rows = supports[neighbor][var]
+            neighbor_counts = conflicts[neighbor]
+            for i in choices[neighbor]:
+                row = rows[i]
+                if (row >> old ^ row >> new) & 1:
+                    neighbor_counts[i] += 1 if row >> old & 1 else -1
+            update(neighbor)
+        update(var)
+
+    return {var: csp.values[var][current[var]] for var in variables} if not conflicted else None
+
+#split the search tree at the root: branch on the first few MRV variables (LCV order, with propagation)
+#until there are enough independent subproblems, each given as its list of (var, value) decisions
+def split_root(csp, workers, max_depth=3):
+    units = [[]]
+    for _ in range(max_depth):
+        if len(units) >= 4 * workers:
+            break
+        next_units = []
+        for unit in units:
+            mark = len(csp.trail)
+            for var, value in unit:
+                try_value(csp, var, value)
+            if len(csp.assignments) == len(csp.variables):
+                next_units.append(unit)  #already a full solution
+            else:
+                variable = csp.choose_variable(csp.assignments)
+                for value in csp.rank_values(variable, csp.assignments):
+                    value_mark = len(csp.trail)
+                    if try_value(csp, variable, value) is None:
+                        next_units.append(unit + [(variable, value)])
+                    csp.undo(value_mark)
+            csp.undo(mark)
+        units = next_units
+    return units
+
+#worker process: inherits csp and units through fork (the constraint lambdas cannot be pickled),
+#claims the next unit index from the shared counter until none are left, and puts
+#(error, solution or None) for every unit, error is None unless the search raised
+def _solve_units(csp, units, next_unit, results):
+    while True:
+        with next_unit.get_lock():
+            index = next_unit.value
+            next_unit.value += 1
+        if index >= len(units):
+            return
+        mark = len(csp.trail)
+        result = None
+        try:
+            if all(try_value(csp, var, value) is None for var, value in units[index]):
+                result = search(csp)
+        except Exception as e:
+            results.put((f'{type(e).__name__}: {e}', None))
+            return
+        csp.undo(mark)
+        results.put((None, result))
+
+def solve_parallel(csp, workers):
+    """
+    Root-splitting parallel search: the forked workers claim the subproblems from split_root one at
+    a time through a shared counter, so a worker that finishes early just takes the next one.
+    The first solution found terminates the rest. Falls back to sequential search where fork is
+    unavailable. Raises RuntimeError with the worker's message if a unit's search raised, or when
+    every worker has exited while some units were never reported.
+    """
+    try:
+        context = multiprocessing.get_context('fork')
+    except ValueError:
+        return search(csp)
+
+    units = split_root(csp, workers)
+    #the units are inherited, only an index is shared, a task queue could fill its pipe before the workers start
+    next_unit, results = context.Value('i', 0), context.Queue()
+    processes = [context.Process(target=_solve_units, args=(csp, units, next_unit, results), daemon=True)
+                 for _ in range(min(workers, len(units)))]
+    for process in processes:
+        process.start()
+    try:
+        pending = len(units)
+        while pending:
+            try:
+                error, result = results.get(timeout=POLL)
+            except Empty:
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    raise RuntimeError('parallel search workers exited before every unit was searched')
+                continue
+            if error is not None:
+                raise RuntimeError(f'parallel search worker failed: {error}')
+            if result is not None:
+                return result
+            pending -= 1
+        return None
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+#connected components of the constraint graph restricted to variables (all by default),
+#variables in declaration order
+def components(csp, variables=None):
+    variables = csp.variables if variables is None else variables
+    inside = set(variables)
+    seen = set()
+    result = []
+    for var in variables:
+        if var in seen:
+            continue
+        seen.add(var)
+        component, stack = [var], [var]
+        while stack:
+            for neighbor in csp.supports[stack.pop()]:
+                if neighbor in inside and neighbor not in seen:
+                    seen.add(neighbor)
+                    component.append(neighbor)
+                    stack.append(neighbor)
+        result.append(sorted(component, key=csp.position.get))
+    return result
+
+#solve every connected component on its own (smallest first) and merge the answers,
+#so a failure in one part never causes retries in another
+def solve_components(csp, workers=None):
+    solution = {}
+    for component in sorted(components(csp), key=len):
+        if len(component) == 1:
+            #unconstrained variable, any value left in its domain works
+            domain = csp.domain(component[0])
+            if not domain:
+                return None
+            solution[component[0]] = domain[0]
             continue
-        valid_values = set()
-        for value in csp.domain_values[variable]:
-            satisfies_all = True
-            for neighbor, constraint_details in csp.constraint_rules[variable].items():
-                constraint_func, is_forward = constraint_details
-                #use next to check if there is any valid value for the neighbor
-
-
-                if not next(
-                    (True for neighbor_value in csp.domain_values[neighbor]
-                     if (is_forward and constraint_func(value, neighbor_value)) or
-                     (not is_forward and constraint_func(neighbor_value, value))),
-                    False
-                ): 
-                #over here the next function is used to check if there exist at least 1 True in the generator
-                #the generator checks if the value satisfies the constraint with any value in the neighbor's domain
-                     
-                    satisfies_all = False
-                    break  #exit early if any constraint is not satisfied
-            
-            if satisfies_all:
-                valid_values.add(value)
-        csp.domain_values[variable] = list(valid_values)
-#recursive backtracking function
-def backtrack(assignments, csp):
-    #all assigned, return assignments
-    if len(assignments) == len(csp.variables):
-        return assignments
-    #choose the next variable to assign
-    var_to_assign = csp.choose_variable(assignments)
-
-    #LCV heuristic to rank values
-    for value in csp.rank_values(var_to_assign, assignments):
-        if csp.is_valid(var_to_assign, value, assignments):
-            new_assignments = assignments.copy()
-            new_assignments[var_to_assign] = value
-
-            #perform forward checking
-            success, backup_domains = csp.forward_check(var_to_assign, value, new_assignments)
-            if success:
-                result = backtrack(new_assignments, csp)
-                if result:
-                    return result
-            csp.restore_domains(backup_domains)
-    return None #no solution found
-
-
-def solve_CSP(data):
+        sub = csp.subproblem(component)
+        result = solve_parallel(sub, workers) if workers is not None and workers > 1 else search(sub)
+        if csp.stats is not None:
+            csp.stats.absorb(sub)
+        if result is None:
+            return None #one unsatisfiable part sinks the whole problem
+        solution.update(result)
+    return solution
+
+#variable whose removal disconnects variables' constraint graph most evenly (an articulation point,
+#found with an iterative Tarjan DFS), or None when no single variable splits them
+def split_variable(csp, variables):
+    inside = set(variables)
+    root = variables[0]
+    order, low, size = {root: 0}, {root: 0}, {root: 1}
+    cut = {}  #articulation point -> sizes of the parts that fall away below it
+    stack = [(root, None, iter(csp.supports[root]))]
+    while stack:
+        var, parent, neighbors = stack[-1]
+        for neighbor in neighbors:
+            if neighbor not in inside or neighbor == parent:
+                continue
+            if neighbor in order:
+                low[var] = min(low[var], order[neighbor])
+            else:
+                order[neighbor] = low[neighbor] = len(order)
+                size[neighbor] = 1
+                stack.append((neighbor, var, iter(csp.supports[neighbor])))
+                break
+        else:
+            stack.pop()
+            if parent is not None:
+                low[parent] = min(low[parent], low[var])
+                size[parent] += size[var]
+                if low[var] >= order[parent]:
+                    cut.setdefault(parent, []).append(size[var])
+
+    best, best_largest = None, len(variables) - 1
+    for var, parts in cut.items():
+        if var == root and len(parts) < 2:
+            continue  #the root only splits the graph with two or more DFS children
+        largest = max(max(parts), len(variables) - 1 - sum(parts))
+        if largest < best_largest or (largest == best_largest and best is not None
+                                      and csp.domains[var].bit_count() < csp.domains[best].bit_count()):
+            best, best_largest = var, largest
+    return best
+
+#number of solutions of the unassigned variables (closed under constraints among the unassigned ones).
+#forward checking keeps the domains consistent with the assignments, so the domains alone describe the
+#subproblem: counts are cached on them, and parts that fall apart after an assignment are counted
+#separately and multiplied. Branches on a variable that splits the part when there is one.
+#explicit stack like solutions(), so the depth is not bounded by the recursion limit
+def count_subproblem(csp, variables, cache):
+    #a frame is [key, total, product over parts or not, what is left to try, branch variable,
+    #             rest of the variables, weight of the value being counted, trail length before it]
+    def enter(variables):
+        """Count right away if cached or trivial, otherwise a frame to work through."""
+        key = tuple((var, csp.domains[var]) for var in variables)
+        if key in cache:
+            return cache[key]
+        parts = components(csp, variables)
+        if len(parts) > 1:
+            return [key, 1, True, iter(sorted(parts, key=len)), None, None, 1, None]
+        if len(variables) == 1:
+            cache[key] = csp.weight(variables[0], csp.domains[variables[0]])
+            return cache[key]
+        inside = set(variables)
+        variable = split_variable(csp, variables) or min(variables, key=lambda var: (
+            csp.domains[var].bit_count(), -sum(neighbor in inside for neighbor in csp.supports[var])))
+        rest = [var for var in variables if var != variable]
+        return [key, 0, False, iter(csp.domain(variable)), variable, rest, 1, None]
+
+    stack = []
+    result = enter(variables)
+    while True:
+        if isinstance(result, list):
+            stack.append(result)
+        elif not stack:
+            return result
+        else:
+            #fold a finished count into the frame that asked for it
+            frame = stack[-1]
+            if frame[2]:
+                frame[1] *= result
+            else:
+                frame[1] += frame[6] * result
+                csp.undo(frame[7])
+
+        frame = stack[-1]
+        key, total, product, todo, variable, rest = frame[:6]
+        result = None
+        if product:
+            if total:
+                part = next(todo, None)
+                if part is not None:
+                    result = enter(part)
+        else:
+            for value in todo:
+                mark = len(csp.trail)
+                if try_value(csp, variable, value) is None:
+                    #every value in value's interchangeability group leaves the same count
+                    frame[6] = csp.weight(variable, 1 << csp.value_index[variable][value])
+                    frame[7] = mark
+                    result = enter(rest)
+                    break
+                csp.undo(mark)
+        if result is None:
+            stack.pop()
+            cache[key] = total
+            result = total
+
+#build the csp for a problem dict, e.g. the public test cases
+def make_csp(data, mac=False, cbj=False, ordering='mrv', restarts=None, stats=None):
     domains = data["domains"]
     constraints = {}
     for (var1, var2), constraint_func in data["constraints"].items():
@@ -153,7 +1040,89 @@ def solve_CSP(data):
             constraints[var2] = {var1: (constraint_func, False)}
         else:
             constraints[var2][var1] = (constraint_func, False)
-    problem = csp(domains, constraints)
-    #pre-process and prune the domains before solving
-    prune_invalid_domains(problem)
-    return backtrack({}, problem)
\ No newline at end of file
+    return csp(domains, constraints, mac, cbj=cbj, ordering=ordering, restarts=restarts, stats=stats)
+
+class CompiledCSP:
+    """
+    A problem compiled once and solved many times under different assumptions. The constructor builds
+    the csp (support tables, adjacency) and makes it arc consistent, that state is the base every
+    solve starts from.
+    solve(assumptions) narrows the base domains to the assumptions, propagates just those changes,
+    searches, and rolls the trail back to the base state afterwards. assumptions maps a variable to a
+    value it is fixed to, or to a collection of values it is restricted to.
+    Values are not bucketed here, an assumption may single out any value of a group.
+    """
+    def __init__(self, data, mac=False, cbj=False, ordering='mrv', restarts=None, stats=None):
+        self.problem = make_csp(data, mac, cbj, ordering, restarts, stats)
+        self.consistent = prune_invalid_domains(self.problem)
+
+    def solve(self, assumptions=None, workers=None):
+        if not self.consistent:
+            return None
+        problem = self.problem
+        mark = len(problem.trail)
+        try:
+            changed = []
+            for var, allowed in (assumptions or {}).items():
+                if isinstance(allowed, (set, frozenset, list, tuple)):
+                    index = problem.value_index[var]
+                    mask = sum(1 << index[value] for value in set(allowed) if value in index)
+                elif allowed in problem.value_index[var]:
+                    mask = 1 << problem.value_index[var][allowed]
+                else:
+                    mask = 0
+                mask &= problem.domains[var]
+                if not mask:
+                    return None
+                if mask != problem.domains[var]:
+                    problem.set_domain(var, mask)
+                    changed.append(var)
+            if not ac3(problem, [(z, var) for var in changed for z in problem.supports[var]]):
+                return None
+            #solve_components searches copies of the narrowed domains, the base trail only holds the narrowing
+            return solve_components(problem, workers)
+        finally:
+            problem.undo(mark)
+
+def iter_solutions(data, mac=False, bucket=True):
+    """
+    Yield every solution of the problem, one dict at a time, without keeping them around.
+    First k solutions: itertools.islice(iter_solutions(data), k).
+    With bucket, search runs over interchangeable value groups and each result is expanded.
+    """
+    problem = make_csp(data, mac)
+    if prune_invalid_domains(problem):
+        if bucket:
+            problem.bucket_values()
+        for solution in solutions(problem):
+            yield from problem.expand(solution)
+
+def count_solutions(data, bucket=True):
+    """Number of solutions, without enumerating them (see count_subproblem)."""
+    problem = make_csp(data)
+    if not prune_invalid_domains(problem):
+        return 0
+    if bucket:
+        problem.bucket_values()
+    return count_subproblem(problem, problem.variables, {})
+
+def solve_CSP(data, mac=False, cbj=False, workers=None, bucket=True, ordering='mrv', restarts=None,
+              local_search=False, max_steps=100000, time_limit=None, tabu_tenure=TABU_TENURE, walk=0.02, seed=0,
+              stats=None):
+    problem = make_csp(data, mac, cbj, ordering, restarts, stats)
+    #pre-process and prune the domains before solving, a wiped out domain means no solution
+    with timed(stats, 'prune'):
+        if not prune_invalid_domains(problem):
+            return None
+    if bucket:
+        #branch over groups of interchangeable values, a representative is a valid concrete answer
+        with timed(stats, 'bucket'):
+            problem.bucket_values()
+    if local_search:
+        #try min-conflicts within its budget first, the complete search takes over if it gives up
+        with timed(stats, 'local_search'):
+            solution = min_conflicts(problem, max_steps, time_limit, tabu_tenure, walk, seed)
+        if solution is not None:
+            return solution
+    with timed(stats, 'search'):
+        return solve_components(problem, workers)
\ No newline at end of file
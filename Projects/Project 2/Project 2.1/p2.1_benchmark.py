@@ -0,0 +1,319 @@
+"""
+Random CSP generators and a scaling benchmark for solve_CSP in Project 2.1.py.
+
+Generates seeded binary CSPs in the same format as p2.1_public_testcases.py:
+model B random problems (n variables, domain size d, density p1, tightness p2)
+and structured families (divisibility chains like public_7, grid colourings,
+sum pairings like public_6, wide not-equal chains for the parallel split). Every instance is solved by each solver
+configuration in a forked process with a timeout, the answer is checked
+against the constraints, and time, nodes, backtracks and support checks are
+reported as JSON. Two reports can be compared, e.g. before and after a change.
+
+Usage:
+    python p2.1_benchmark.py --family model_b --n 40 --d 10 --p1 0.25 --p2 0.2 0.5 0.05 --out report.json
+    python p2.1_benchmark.py --family chain grid pairing --configs default cbj domwdeg
+    python p2.1_benchmark.py --compare old.json new.json
+"""
+from typing import List, Tuple, Dict, Any
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import queue
+import random
+import signal
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+#name -> keyword arguments for solve_CSP
+CONFIGS = {
+    'default': {},
+    'no_bucket': {'bucket': False},
+    'mac': {'mac': True},
+    'cbj': {'cbj': True},
+    'domwdeg': {'ordering': 'domwdeg'},
+    'domwdeg_restarts': {'ordering': 'domwdeg', 'restarts': 100},
+    'local_search': {'local_search': True},
+    'parallel': {'workers': 2},
+}
+
+
+def model_b(seed, n=20, d=10, p1=0.5, p2=0.3) -> Dict[str, Any]:
+    """
+    Model B: exactly round(p1 * n(n-1)/2) constrained pairs, each forbidding exactly
+    round(p2 * d^2) value pairs, all chosen uniformly at random.
+    """
+    rng = random.Random(seed)
+    pairs = [(a, b) for a in range(n) for b in range(a + 1, n)]
+    value_pairs = [(x, y) for x in range(d) for y in range(d)]
+    constraints = {}
+    for a, b in rng.sample(pairs, round(p1 * len(pairs))):
+        bad = frozenset(rng.sample(value_pairs, round(p2 * len(value_pairs))))
+        constraints[(str(a), str(b))] = lambda x, y, bad=bad: (x, y) not in bad
+    return {
+        'domains': {str(var): list(range(d)) for var in range(n)},
+        'constraints': constraints,
+    }
+
+
+def chain(seed, n=10, top=1024, first=5) -> Dict[str, Any]:
+    """Divisibility chain like public_7: each variable is a proper multiple of the one before."""
+    rng = random.Random(seed)
+    domains = {'0': rng.sample(range(1, first + 1), rng.randint(1, first))}
+    for var in range(1, n):
+        domains[str(var)] = list(range(1, top))
+    constraints = {(str(var - 1), str(var)): lambda x, y: y % x == 0 and x != y for var in range(1, n)}
+    return {'domains': domains, 'constraints': constraints}
+
+
+def grid(seed, rows=6, cols=6, colours=3, keep=0.8) -> Dict[str, Any]:
+    """Grid colouring: orthogonal neighbours differ, every cell keeps a random part of the colours."""
+    rng = random.Random(seed)
+    domains = {}
+    for r in range(rows):
+        for c in range(cols):
+            domains[f'{r},{c}'] = sorted(rng.sample(range(colours), max(1, round(keep * colours))))
+    constraints = {}
+    for r in range(rows):
+        for c in range(cols):
+            if r + 1 < rows:
+                constraints[(f'{r},{c}', f'{r + 1},{c}')] = lambda x, y: x != y
+            if c + 1 < cols:
+                constraints[(f'{r},{c}', f'{r},{c + 1}')] = lambda x, y: x != y
+    return {'domains': domains, 'constraints': constraints}
+
+
+def pairing(seed, pairs=5, d=10, top=100, satisfiable=0.8) -> Dict[str, Any]:
+    """Sum pairings like public_6: x + y == target per pair, the target is reachable with probability satisfiable."""
+    rng = random.Random(seed)
+    domains = {}
+    constraints = {}
+    for pair in range(pairs):
+        x, y = str(2 * pair + 1), str(2 * pair + 2)
+        domains[x] = [rng.randrange(top) for _ in range(d)]
+        domains[y] = [rng.randrange(top) for _ in range(d)]
+        if rng.random() < satisfiable:
+            target = rng.choice(domains[x]) + rng.choice(domains[y])
+        else:
+            target = rng.randrange(2 * top)
+        constraints[(x, y)] = lambda a, b, target=target: a + b == target
+    return {'domains': domains, 'constraints': constraints}
+
+
+def wide(seed, n=3, first=4, width=1000) -> Dict[str, Any]:
+    """
+    Not-equal chain with a small first domain and wide ones after it. The parallel search splits the
+    first two levels into thousands of subproblems, more than fit in a pipe at once.
+    """
+    rng = random.Random(seed)
+    domains = {'0': rng.sample(range(width), first)}
+    for var in range(1, n):
+        domains[str(var)] = list(range(width))
+    constraints = {(str(var - 1), str(var)): lambda x, y: x != y for var in range(1, n)}
+    return {'domains': domains, 'constraints': constraints}
+
+
+FAMILIES = {
+    'model_b': model_b,
+    'chain': chain,
+    'grid': grid,
+    'pairing': pairing,
+    'wide': wide,
+}
+
+
+def check(data, solution) -> bool:
+    """True if solution assigns every variable a value from its domain and satisfies every constraint."""
+    if set(solution) != set(data['domains']):
+        return False
+    if any(solution[var] not in domain for var, domain in data['domains'].items()):
+        return False
+    return all(constraint(solution[x], solution[y]) for (x, y), constraint in data['constraints'].items())
+
+
+def load_solver(path):
+    """Import a solver file by path (the file names are not valid module names)."""
+    spec = importlib.util.spec_from_file_location('solver', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _worker(solver, data, config, sample_every, results):
+    os.setsid()  #own process group, so a timeout also kills a parallel run's workers
+    stats = solver.SolverStats(sample_every) if hasattr(solver, 'SolverStats') else None
+    kwargs = dict(config, stats=stats) if stats is not None else config
+    start_time = time.perf_counter()
+    try:
+        solution = solver.solve_CSP(data, **kwargs)
+        error = None
+    except Exception as e:
+        solution = None
+        error = f'{type(e).__name__}: {e}'
+    elapsed = time.perf_counter() - start_time
+    results.put((solution is not None, solution is not None and check(data, solution), error,
+                 elapsed, stats.as_dict() if stats is not None else None))
+
+
+def run_one(solver, data, config, timeout=None, sample_every=64) -> Dict[str, Any]:
+    """
+    Solve one instance in a forked process (the constraint lambdas cannot be pickled, fork
+    passes them on) and kill it after timeout seconds.
+    """
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    #not a daemon, daemons cannot start the parallel config's workers
+    process = context.Process(target=_worker, args=(solver, data, config, sample_every, results))
+    process.start()
+    try:
+        found, legal, error, elapsed, stats = results.get(timeout=timeout)
+    except queue.Empty:
+        found, legal, error, elapsed, stats = False, None, 'timeout', timeout, None
+    finally:
+        if process.is_alive():
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        process.join()
+
+    result = {
+        'found': found,
+        'legal': legal,
+        'error': error,
+        'time': round(elapsed, 6),
+        'nodes': None,
+        'backtracks': None,
+        'checks': None,
+        'wipeouts': None,
+    }
+    if stats is not None:
+        result.update(nodes=stats['nodes'], backtracks=stats['backtracks'],
+                      checks=sum(stats['checks'].values()), wipeouts=stats['wipeouts'])
+    return result
+
+
+def instances(args) -> List[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+    """(family, parameters, data) for every family and sweep point in args, instances_per_point seeds each."""
+    result = []
+    for family in args.family:
+        if family == 'model_b':
+            low, high, step = args.p2
+            points = [{'n': args.n, 'd': args.d, 'p1': args.p1, 'p2': round(low + k * step, 6)}
+                      for k in range(int(round((high - low) / step)) + 1)]
+        elif family == 'chain':
+            points = [{'n': n} for n in (4, 6, 8, 10)]
+        elif family == 'grid':
+            points = [{'rows': size, 'cols': size, 'colours': 3, 'keep': 0.8} for size in (4, 6, 8)]
+        elif family == 'wide':
+            points = [{'width': width} for width in (100, 1000, 5000)]
+        else:
+            points = [{'pairs': pairs} for pairs in (5, 10, 20)]
+        for params in points:
+            for seed in range(args.seed, args.seed + args.instances):
+                result.append((family, dict(params, seed=seed), FAMILIES[family](seed, **params)))
+    return result
+
+
+def summarise(results) -> Dict[str, Any]:
+    summary = {}
+    for res in results:
+        entry = summary.setdefault(res['config'], {
+            'runs': 0, 'found': 0, 'illegal': 0, 'timeouts': 0, 'errors': 0,
+            'total_time': 0.0, 'total_nodes': 0, 'total_checks': 0})
+        entry['runs'] += 1
+        entry['found'] += res['found']
+        entry['illegal'] += res['found'] and not res['legal']
+        entry['timeouts'] += res['error'] == 'timeout'
+        entry['errors'] += res['error'] not in (None, 'timeout')
+        entry['total_time'] += res['time'] or 0.0
+        entry['total_nodes'] += res['nodes'] or 0
+        entry['total_checks'] += res['checks'] or 0
+    for entry in summary.values():
+        entry['total_time'] = round(entry['total_time'], 6)
+    return summary
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    solver = load_solver(args.solver)
+    configs = {name: CONFIGS[name] for name in args.configs}
+    results = []
+    for family, params, data in instances(args):
+        for name, config in configs.items():
+            res = run_one(solver, data, config, args.timeout, args.sample_every)
+            results.append({'family': family, 'params': params, 'config': name, **res})
+            if args.verbose:
+                print(family, params, name, res['time'], res['nodes'], res['error'] or '', file=sys.stderr)
+    return {'results': results, 'summary': summarise(results)}
+
+
+def compare(old, new) -> Dict[str, Any]:
+    """Per configuration: totals of both reports over the runs they share without a timeout, and new / old ratios."""
+    def key(res):
+        return res['family'], json.dumps(res['params'], sort_keys=True), res['config']
+    old_runs = {key(res): res for res in old['results']}
+    shared = [(old_runs[key(res)], res) for res in new['results'] if key(res) in old_runs]
+    table = {}
+    for before, after in shared:
+        entry = table.setdefault(after['config'], {'runs': 0, 'timeouts': 0, 'old_time': 0.0, 'new_time': 0.0,
+                                                   'old_nodes': 0, 'new_nodes': 0, 'changed_answers': 0})
+        #a timeout is neither an answer nor a time, such runs are only counted
+        if 'timeout' in (before['error'], after['error']):
+            entry['timeouts'] += 1
+            continue
+        entry['runs'] += 1
+        entry['old_time'] += before['time'] or 0.0
+        entry['new_time'] += after['time'] or 0.0
+        entry['old_nodes'] += before['nodes'] or 0
+        entry['new_nodes'] += after['nodes'] or 0
+        entry['changed_answers'] += before['found'] != after['found']
+    for entry in table.values():
+        entry['time_ratio'] = round(entry['new_time'] / entry['old_time'], 3) if entry['old_time'] else None
+        entry['node_ratio'] = round(entry['new_nodes'] / entry['old_nodes'], 3) if entry['old_nodes'] else None
+        entry['old_time'] = round(entry['old_time'], 6)
+        entry['new_time'] = round(entry['new_time'], 6)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--solver', default=os.path.join(HERE, 'Project 2.1.py'), help='solver file to benchmark')
+    parser.add_argument('--family', nargs='*', default=['model_b'], choices=list(FAMILIES))
+    parser.add_argument('--configs', nargs='*', default=['default'], choices=list(CONFIGS))
+    parser.add_argument('--n', type=int, default=30, help='model_b: number of variables')
+    parser.add_argument('--d', type=int, default=10, help='model_b: domain size')
+    parser.add_argument('--p1', type=float, default=0.3, help='model_b: density')
+    parser.add_argument('--p2', type=float, nargs=3, default=[0.2, 0.5, 0.05], metavar=('LOW', 'HIGH', 'STEP'),
+                        help='model_b: tightness sweep')
+    parser.add_argument('--instances', type=int, default=5, help='seeds per sweep point')
+    parser.add_argument('--seed', type=int, default=0, help='first seed')
+    parser.add_argument('--timeout', type=float, default=30.0, help='seconds per solve')
+    parser.add_argument('--sample-every', type=int, default=64, help='SolverStats sampling, 1 counts every check')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two reports instead of running')
+    parser.add_argument('--out', default=None, help='write the JSON report here instead of stdout')
+    parser.add_argument('--verbose', action='store_true', help='print every run to stderr')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path) as file:
+                reports.append(json.load(file))
+        report = compare(*reports)
+    else:
+        report = run_benchmark(args)
+        report['config'] = {key: value for key, value in vars(args).items() if key not in ('out', 'compare', 'verbose')}
+
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,41 @@
+from collections import OrderedDict
+from queue import Empty
+import multiprocessing
+import random
+import sys
+
+#while no task reports back, solve_parallel looks every POLL seconds whether its workers are still running
+POLL = 1.0
+
+#CSP search counters that solve_parallel adds up over its workers' searches
+COUNTERS = ('nodes', 'backtracks', 'cache_hits', 'cache_probes')
+
+def board_symmetries(rows, cols, obstacles):
+    """
+    Rotations and reflections other than the identity that map the board and its obstacles onto
+    themselves, as (transpose, flip_rows, flip_cols): flip first, then transpose (square boards only).
+    """
+    result = []
+    for transpose in ((False, True) if rows == cols else (False,)):
+        for flip_rows in (False, True):
+            for flip_cols in (False, True):
+                symmetry = (transpose, flip_rows, flip_cols)
+                if symmetry != (False, False, False) and all(
+                        transform_square(symmetry, rows, cols, 1, r, c) in obstacles for r, c in obstacles):
+                    result.append(symmetry)
+    return result
+
+def transform_square(symmetry, rows, cols, size, row, col):
+    """Top-left corner of the image of a size x size square at (row, col)."""
+    transpose, flip_rows, flip_cols = symmetry
+    if flip_rows:
+        row = rows - row - size
+    if flip_cols:
+        col = cols - col - size
+    return (col, row) if transpose else (row, col)
+
 class CSP:
-    def __init__(self, rows, cols, squares, obstacles):
+    def __init__(self, rows, cols, squares, obstacles, cache_size=200000, seed=None, symmetry=True):
         """
         Initialize the CSP solver with the grid size, available squares, and obstacles.
         """
@@ -7,9 +43,51 @@ class CSP:
         self.cols = cols
         self.squares = squares.copy()  #Copy to avoid modifying the input data directly
         self.obstacles = set(obstacles)
-        self.grid = [[0] * cols for i in range(rows)]  #create empty grid
+        #one bitmask per row, bit c set = cell (row, c) taken by an obstacle or a square
+        self.full = (1 << cols) - 1
+        self.board = [0] * rows
+        for r, c in self.obstacles:
+            self.board[r] |= 1 << c
+        #size -> mask of `size` consecutive bits, shifted to the column when used
+        self.run_mask = {size: (1 << size) - 1 for size in self.squares}
         self.solution = [] #list to store the solution
 
+        #transposition table of states known to fail, least recently used evicted first.
+        #everything before the cursor is filled and squares reach at most max size - 1 rows below it,
+        #so the cursor row, the next max size rows and the remaining counts pin down the state
+        self.sizes = sorted(self.squares, reverse=True)
+        #order the sizes are tried in at each anchor, largest first unless a seed shuffles it
+        self.order = list(self.sizes)
+        if seed is not None:
+            random.Random(seed).shuffle(self.order)
+        self.depth = max(self.sizes, default=1)
+        self.cache_size = cache_size
+        self.failed = OrderedDict()
+        self.cache_probes = 0
+        self.cache_hits = 0
+        self.nodes = 0  #squares placed
+        self.backtracks = 0  #squares taken back off
+
+        #gap pruning only holds for an exact cover, i.e. when the squares have exactly the free area.
+        #placing a square takes the same area from both sides, so checking it once here is enough
+        free_area = rows * cols - sum(bin(mask).count('1') for mask in self.board)
+        self.exact = free_area == sum(size * size * count for size, count in self.squares.items())
+        self.widths = {}  #remaining counts -> bitset of the row widths they can fill exactly
+
+        #symmetry breaking, exact covers only: any rotation or reflection of a packing of a symmetric
+        #board is a packing too, so only packings whose first square of the largest size sits in the
+        #smallest position of its orbit are searched, see symmetry_allows
+        self.symmetries = board_symmetries(rows, cols, self.obstacles) if self.exact and symmetry else []
+        self.sym_size = max((size for size, count in self.squares.items() if count), default=None)
+        self.first = None  #(row, col) of the first square of sym_size placed so far
+        if self.symmetries and self.sym_size is not None:
+            #anchors only move forward, past the last allowed position that square can never go down
+            allowed = [(r, c) for r in range(rows) for c in range(cols)
+                       if self.is_placeable(self.sym_size, r, c) and self.symmetry_allows(self.sym_size, r, c)]
+            self.last_first = max(allowed, default=(-1, -1))
+        else:
+            self.symmetries = []
+
     def is_placeable(self, size, row, col):
         """
         This one checks if a square of a given size can be placed at a given position.
@@ -18,92 +96,529 @@ class CSP:
         if row + size > self.rows or col + size > self.cols:
             return False  #OOB check
 
-        #check that the grid we are checking can fit the square, if got 1 obstacle or square, return False
+        #every row the square covers must have the whole run free, one AND per row
+        run = self.run_mask[size] << col
+        board = self.board
         for r in range(row, row + size):
-            for c in range(col, col + size):
-                if self.grid[r][c] != 0 or (r, c) in self.obstacles:
-                    return False
+            if board[r] & run:
+                return False
         return True
 
     def mark_square(self, size, row, col, place):
         """
         Mark the grid if a square is placed.
+        Placing and removing are the same XOR of the run into each row, place is kept for readability.
         """
-        if place:
-            value = size
-        else:
-            value = 0
+        run = self.run_mask[size] << col
+        board = self.board
         for r in range(row, row + size):
-            for c in range(col, col + size):
-                self.grid[r][c] = value
+            board[r] ^= run
 
     def find_next_empty(self, row, col):
         """
         Find the next empty cell that is not filled by a square or obstacle
         """
         while row < self.rows:
-            while col < self.cols:
-                if self.grid[row][col] == 0 and (row, col) not in self.obstacles:
-                    return row, col #empty spot found hehe
-                col += 1
+            #free cells of this row from col onwards, the lowest one is the answer
+            free = ~self.board[row] & self.full & ~((1 << col) - 1)
+            if free:
+                return row, (free & -free).bit_length() - 1 #empty spot found hehe
             row += 1
             col = 0 #count from next row
         return None, None  #no empty spots left
 
-    def backtrack(self):
-
+    def backtrack(self, row=0, col=0):
+        """
+        row, col is a cursor that only moves forward: squares always go on the first empty cell and
+        only cover cells after it, so everything before the cursor stays filled. Each call keeps its
+        own cursor, which restores it on backtrack for free.
+        """
         if not any(self.squares.values()):
             return True #no more squares to place means SOLVED
 
         #Find the next empty position to start placing
-        row, col = self.find_next_empty(0, 0)
+        row, col = self.find_next_empty(row, col)
         if row is None:
             return True  #no more empty spots left
 
+        if self.symmetries and self.first is None and (row, col) > self.last_first:
+            return False  #the first square of sym_size cannot go anywhere allowed anymore
+
+        #same filled region and same squares left as a state that already failed
+        #(so is first while sym_size squares are left, it decides where they may go)
+        counts = tuple(self.squares[size] for size in self.sizes)
+        first = self.first if self.symmetries and self.squares[self.sym_size] else None
+        key = (row, tuple(self.board[row:row + self.depth]), counts, first)
+        self.cache_probes += 1
+        if key in self.failed:
+            self.cache_hits += 1
+            self.failed.move_to_end(key)
+            return False
+
+        if self.exact:
+            smallest = min(size for size in self.sizes if self.squares[size])
+            if not self.row_gaps_fillable(row, counts) or not self.gaps_coverable(row, smallest):
+                self.fail(key)
+                return False
+
+        #free cells from the anchor to the right, no wider square can go here
+        taken = self.board[row] >> col
+        width = (taken & -taken).bit_length() - 1 if taken else self.cols - col
+
         #Place the largest available square first
-        for size in sorted(self.squares.keys(), reverse=True):
-            if self.squares[size] == 0:
+        for size in self.order:
+            if self.squares[size] == 0 or size > width:
                 continue
 
             if self.is_placeable(size, row, col):
+                first = False
+                if self.symmetries and size == self.sym_size:
+                    if not self.symmetry_allows(size, row, col):
+                        continue
+                    first = self.first is None
                 #if can place, we mark then reduce count then add to solution
                 self.mark_square(size, row, col, True)
+                self.nodes += 1
                 self.solution.append((size, row, col))
                 self.squares[size] -= 1
-                #Recursively try to place the next square
-                if self.backtrack():
+                if first:
+                    self.first = (row, col)
+                #Recursively try to place the next square, the cells up to col + size on this row are filled now
+                if self.backtrack(row, col + size):
                     return True
 
                 #if cannot then we just backtrack
                 self.mark_square(size, row, col, False)
+                self.backtracks += 1
                 self.solution.pop()
                 self.squares[size] += 1  #add back the square we tried to place
+                if first:
+                    self.first = None
 
+        self.fail(key)
         return False  #no valid placement found for this square
 
+    def symmetry_allows(self, size, row, col):
+        """
+        Squares go down in row-major order, so the first square of sym_size placed is the smallest
+        of its size. Any packing can be turned by the symmetry that moves one of its sym_size squares
+        to the smallest position any symmetry can move them to. In the result, no symmetry moves a
+        sym_size square below the first one, so requiring that here loses no solutions. Before the
+        first one is placed, this says its position has to be the smallest of its orbit.
+        """
+        first = self.first or (row, col)
+        return all(transform_square(symmetry, self.rows, self.cols, size, row, col) >= first
+                   for symmetry in self.symmetries)
+
+    def apply(self, placements):
+        """Place squares outside of backtrack (root splits), keeping the same bookkeeping."""
+        for size, row, col in placements:
+            self.mark_square(size, row, col, True)
+            self.squares[size] -= 1
+            self.solution.append((size, row, col))
+            if self.symmetries and size == self.sym_size and self.first is None:
+                self.first = (row, col)
+
+    def unapply(self, placements):
+        for size, row, col in reversed(placements):
+            self.mark_square(size, row, col, False)
+            self.squares[size] += 1
+            self.solution.pop()
+            if self.symmetries and size == self.sym_size and self.first == (row, col):
+                self.first = None
+
+    def fail(self, key):
+        self.failed[key] = None
+        if len(self.failed) > self.cache_size:
+            self.failed.popitem(last=False)
+
+    def fillable_widths(self, counts):
+        """
+        Bitset of the widths a row of free cells can be split into using the remaining squares,
+        bit w set = some multiset of the remaining sizes adds up to w. Cached per remaining counts.
+        """
+        widths = self.widths.get(counts)
+        if widths is None:
+            widths = 1
+            for size, count in zip(self.sizes, counts):
+                for _ in range(min(count, self.cols // size)):
+                    widths |= widths << size
+            widths &= (1 << (self.cols + 1)) - 1
+            self.widths[counts] = widths
+        return widths
+
+    def gaps_coverable(self, row, smallest):
+        """
+        Every free cell in the rows squares can still reach from the cursor needs a free
+        smallest x smallest block around it, a gap narrower than that can never be filled.
+        Worked out with bitmasks: starts of horizontal free runs of that length, ANDed over
+        `smallest` consecutive rows, give the corners of free blocks, spread back over their cells.
+        """
+        if smallest <= 1:
+            return True
+        board, full = self.board, self.full
+        last = min(self.rows, row + self.depth + smallest - 1)
+        starts = []  #starts[i]: columns where a free run of length smallest begins on row row + i
+        for r in range(row, last):
+            free = ~board[r] & full
+            run = free
+            for shift in range(1, smallest):
+                run &= free >> shift
+            starts.append(run)
+        corners = []  #corners[i]: top-left corners of free blocks with their top row at row + i
+        for i in range(len(starts) - smallest + 1):
+            block = starts[i]
+            for k in range(1, smallest):
+                block &= starts[i + k]
+            corners.append(block)
+        for i in range(min(self.depth, last - row)):
+            free = ~board[row + i] & full
+            if not free:
+                continue
+            covered = 0
+            for j in range(max(0, i - smallest + 1), min(i + 1, len(corners))):
+                covered |= corners[j]
+            spread = covered
+            for _ in range(1, smallest):
+                covered = covered << 1
+                spread |= covered
+            if free & ~spread:
+                return False
+        return True
+
+    def row_gaps_fillable(self, row, counts):
+        """
+        A free cell on the cursor row can only be covered by a square whose corner is on that row too
+        (squares go on the first empty cell), so every run of free cells on it has to be exactly a sum
+        of remaining sizes. A run narrower than the smallest remaining square fails this as well.
+        """
+        widths = self.fillable_widths(counts)
+        free = ~self.board[row] & self.full
+        while free:
+            start = (free & -free).bit_length() - 1
+            run = free >> start
+            length = ((run ^ (run + 1)) >> 1).bit_length()  #trailing ones
+            if not widths >> length & 1:
+                return False
+            free &= ~(((1 << length) - 1) << start)
+        return True
+
+    def cache_hit_rate(self):
+        """Share of the visited states that the transposition table cut off."""
+        return self.cache_hits / self.cache_probes if self.cache_probes else 0.0
+
     def solve(self):
         """
         Start the CSP solver and return the solution (if found).
         Returns a list of tuples representing placed squares (size, row, col).
         """
-        if self.backtrack():
-            return self.solution
+        #backtrack recurses once per square placed, which is up to one per free cell
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, self.rows * self.cols + 100))
+        try:
+            if self.backtrack():
+                return self.solution
+            return []
+        finally:
+            sys.setrecursionlimit(limit)
+
+class ExactCover:
+    """
+    Square packing as exact cover, solved with Dancing Links (Algorithm X).
+    Every placement of a square over free cells is a row. It covers one column per cell, which has to
+    be covered exactly once, and one column for its size, which takes as many rows as there are
+    squares of that size: the size column is only covered (every other placement of that size taken
+    out) once its count runs out. Placements of the largest sizes come first in every column.
+    Only exact covers are searched, the caller falls back to CSP when the areas do not add up.
+    """
+    def __init__(self, rows, cols, squares, obstacles):
+        self.rows = rows
+        self.cols = cols
+        self.counts = {size: count for size, count in squares.items() if count}
+        self.obstacles = set(obstacles)
+        self.nodes = 0  #rows picked
+        self.backtracks = 0  #rows given up again
+        self.solution = []
+        self.build()
+
+    def build(self):
+        """Header 0 is the root, then one header per free cell and one per size, then the row nodes."""
+        free = [(r, c) for r in range(self.rows) for c in range(self.cols) if (r, c) not in self.obstacles]
+        cell_column = {cell: i + 1 for i, cell in enumerate(free)}
+        size_column = {size: len(free) + 1 + i for i, size in enumerate(self.counts)}
+        headers = len(free) + len(self.counts) + 1
+
+        self.L = list(range(-1, headers - 1))
+        self.R = list(range(1, headers + 1))
+        #only the cell columns are in the root's list, size columns link to themselves
+        self.L[0], self.R[len(free)] = len(free), 0
+        for column in size_column.values():
+            self.L[column] = self.R[column] = column
+        self.U = list(range(headers))
+        self.D = list(range(headers))
+        self.C = list(range(headers))
+        self.S = [0] * headers  #rows left per column
+        self.placement = {}  #first node of a row -> (size, row, col)
+        self.size_of = {column: size for size, column in size_column.items()}
+
+        for size in sorted(self.counts, reverse=True):
+            for r in range(self.rows - size + 1):
+                for c in range(self.cols - size + 1):
+                    cells = [(r + i, c + j) for i in range(size) for j in range(size)]
+                    if all(cell in cell_column for cell in cells):
+                        self.add_row([cell_column[cell] for cell in cells] + [size_column[size]], (size, r, c))
+
+    def add_row(self, columns, placement):
+        first = len(self.C)
+        for k, column in enumerate(columns):
+            node = first + k
+            #append to the bottom of the column
+            self.U.append(self.U[column])
+            self.D.append(column)
+            self.D[self.U[column]] = node
+            self.U[column] = node
+            self.C.append(column)
+            self.S[column] += 1
+            #circular list along the row
+            self.L.append(node - 1 if k else first + len(columns) - 1)
+            self.R.append(node + 1 if k < len(columns) - 1 else first)
+        self.placement[first] = placement
+
+    def cover(self, column):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        L[R[column]] = L[column]
+        R[L[column]] = R[column]
+        i = D[column]
+        while i != column:
+            j = R[i]
+            while j != i:
+                U[D[j]] = U[j]
+                D[U[j]] = D[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, column):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[column]
+        while i != column:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                U[D[j]] = j
+                D[U[j]] = j
+                j = L[j]
+            i = U[i]
+        L[R[column]] = column
+        R[L[column]] = column
+
+    def select(self, node):
+        """Take the row of node: cover its other cell columns and use up one square of its size."""
+        j = self.R[node]
+        while j != node:
+            column = self.C[j]
+            if column in self.size_of:
+                size = self.size_of[column]
+                self.counts[size] -= 1
+                if not self.counts[size]:
+                    self.cover(column)
+            else:
+                self.cover(column)
+            j = self.R[j]
+
+    def deselect(self, node):
+        self.backtracks += 1
+        j = self.L[node]
+        while j != node:
+            column = self.C[j]
+            if column in self.size_of:
+                size = self.size_of[column]
+                if not self.counts[size]:
+                    self.uncover(column)
+                self.counts[size] += 1
+            else:
+                self.uncover(column)
+            j = self.L[j]
+
+    def choose_column(self):
+        """
+        MRV restricted to forced cells: a cell with one placement left (or none, a dead end) goes first.
+        Otherwise the first free cell in row-major order, which keeps the filled region in one piece the
+        way CSP.backtrack does. Full MRV jumps around the board and leaves gaps that fail much later.
+        """
+        R, S = self.R, self.S
+        column = R[0]
+        while column:
+            if S[column] <= 1:
+                return column
+            column = R[column]
+        return R[0]
+
+    def row_start(self, node):
+        while node not in self.placement:
+            node = self.L[node]
+        return node
+
+    def solve(self):
+        """
+        Algorithm X with an explicit stack, so the depth (number of squares) is not bounded by the
+        recursion limit. Returns the placements as (size, row, col) in row-major order, or [].
+        """
+        chosen = []  #row node picked at every level
+        while True:
+            if not self.R[0]:
+                self.solution = sorted((self.placement[self.row_start(node)] for node in chosen),
+                                       key=lambda placement: (placement[1], placement[2]))
+                return self.solution
+            column = self.choose_column()
+            self.cover(column)
+            node = self.D[column]
+            while node == column:
+                #column has no rows left, go back to the previous level and take its next row
+                self.uncover(column)
+                if not chosen:
+                    return []
+                node = chosen.pop()
+                self.deselect(node)
+                column = self.C[node]
+                node = self.D[node]
+            self.select(node)
+            self.nodes += 1
+            chosen.append(node)
+
+def split_root(solver, depth):
+    """
+    Every way to make the first `depth` placements (first empty cell each time, as backtrack does),
+    as lists of (size, row, col). The subtrees below them are independent and together cover the
+    whole search.
+    """
+    units = [[]]
+    for _ in range(depth):
+        next_units = []
+        for unit in units:
+            solver.apply(unit)
+            row, col = solver.find_next_empty(0, 0)
+            if row is None or not any(solver.squares.values()):
+                next_units.append(unit)  #already done, backtrack returns right away
+            else:
+                for size in solver.order:
+                    if solver.squares[size] and solver.is_placeable(size, row, col) and not (
+                            solver.symmetries and size == solver.sym_size and not solver.symmetry_allows(size, row, col)):
+                        next_units.append(unit + [(size, row, col)])
+            solver.unapply(unit)
+        units = next_units
+    return units
+
+def _solve_tasks(problem, tasks, next_task, results):
+    """
+    Worker process: claims the next task index from the shared counter until none are left.
+    ('unit', placements) searches below a root split, ('portfolio', seed) searches the whole problem
+    with a shuffled size order.
+    Puts (kind, error, solution or None, COUNTERS values) for each, and stops after an error.
+    """
+    while True:
+        with next_task.get_lock():
+            index = next_task.value
+            next_task.value += 1
+        if index >= len(tasks):
+            return
+        kind, arg = tasks[index]
+        try:
+            if kind == 'portfolio':
+                solver = CSP(*problem, seed=arg)
+            else:
+                solver = CSP(*problem)
+                solver.apply(arg)
+            solution = solver.solve() or None
+        except Exception as e:
+            results.put((kind, f'{type(e).__name__}: {e}', None, [0] * len(COUNTERS)))
+            return
+        results.put((kind, None, solution, [getattr(solver, name) for name in COUNTERS]))
+
+def solve_parallel(rows, cols, squares, obstacles, workers, depth=2, portfolio=1, counters=None):
+    """
+    Root-split parallel search: the subtrees below the first `depth` placements are tasks, behind
+    `portfolio` whole-problem searches with shuffled size orders that start first. Workers claim
+    tasks one at a time through a shared counter, so one that finishes early picks up the next.
+    The first solution found ends everything. So does a portfolio search that fails, because it
+    searched the whole problem, or every subtree failing.
+    Falls back to the sequential search where fork is unavailable. A task whose CSP raised ends the
+    run with RuntimeError, as do workers that are all gone before every task has reported.
+    counters, if given, is a dict that gets the COUNTERS of every finished search added up.
+    Tasks still running when the result is known are cut off and not counted.
+    """
+    def count(values):
+        if counters is not None:
+            for name, value in zip(COUNTERS, values):
+                counters[name] = counters.get(name, 0) + value
+
+    problem = (rows, cols, squares, obstacles)
+    solver = CSP(*problem)
+    try:
+        context = multiprocessing.get_context('fork')
+    except ValueError:
+        context = None
+    if context is None or not solver.exact:
+        #no fork, or a partial packing, which follows the sequential search's order
+        solution = solver.solve()
+        count([getattr(solver, name) for name in COUNTERS])
+        return solution
+
+    units = split_root(solver, depth)
+    tasks = [('portfolio', seed) for seed in range(portfolio)] + [('unit', unit) for unit in units]
+    #workers inherit the task list through fork, only the index of the next one is shared
+    next_task, results = context.Value('i', 0), context.Queue()
+    processes = [context.Process(target=_solve_tasks, args=(problem, tasks, next_task, results), daemon=True)
+                 for _ in range(min(workers, len(tasks)))]
+    for process in processes:
+        process.start()
+    try:
+        pending = len(tasks)
+        while pending:
+            try:
+                kind, error, solution, values = results.get(timeout=POLL)
+            except Empty:
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    raise RuntimeError('parallel search workers exited before every task was searched')
+                continue
+            if error is not None:
+                raise RuntimeError(f'parallel search worker failed: {error}')
+            count(values)
+            if solution is not None:
+                return solution
+            if kind == 'portfolio':
+                return []
+            pending -= 1
         return []
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
 
-def solve_CSP(dct):
+def solve_CSP(dct, method='backtrack', workers=None):
+    """
+    method: 'backtrack' (CSP) or 'dlx' (ExactCover). DLX only handles exact covers and falls
+    back to backtracking when the squares' area is not the free area.
+    workers > 1 runs the backtracking search in parallel (solve_parallel).
+    """
     rows = dct['rows']
     cols = dct['cols']
     input_squares = dct['input_squares']
     obstacles = dct['obstacles']
 
     solver = CSP(rows, cols, input_squares, obstacles)
+    if method == 'dlx' and solver.exact:
+        return ExactCover(rows, cols, input_squares, obstacles).solve()
+    if workers is not None and workers > 1:
+        return solve_parallel(rows, cols, input_squares, obstacles, workers)
     return solver.solve()
 
 """
 Aight big guy here's the big deal
 Greedy method is to fit big squares first
-We create a grid of 0s. If we can fit a square, we mark the grid with the size of the square
-now instead of naively checking if 
+We keep the grid as one bitmask per row, obstacles already set. If we can fit a square, we XOR its run
+of bits into the rows it covers, so checking and marking a square is one integer operation per row
+instead of one per cell
 
 Since it is constraint that all grid will be filled by either square or obstacle,
 if the square no longer contains 0 then we have solved it
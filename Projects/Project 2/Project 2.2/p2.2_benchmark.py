@@ -0,0 +1,283 @@
+"""
+Instance generator and scaling benchmark for the square-packing solver in Project 2.2 Part 2.py.
+
+Generates seeded boards in the same format as p2.2_csp_public_testcases.py that are
+solvable by construction: the board is cut recursively into rectangles until every
+piece is a square or an obstacle cell, with the cuts biased towards large squares.
+Near-miss variants keep the board and the free area but swap squares so that no
+packing exists, and the solver has to prove it. 'starved' merges 1x1 squares into
+2x2 squares until fewer are left than there are cells only a 1x1 square fits in.
+'too_big' pays with 1x1 squares for one square larger than any free square.
+
+Every board is solved once per solver mode in a forked process with a timeout.
+The packing is checked, and time, nodes, backtracks and the transposition table's hit
+rate are reported as JSON. In the parallel mode the counters cover the searches that finished.
+
+Usage:
+    python p2.2_benchmark.py --sizes 8 16 32 64 100 --instances 3 --out report.json
+    python p2.2_benchmark.py --modes backtrack dlx --near-miss --timeout 10
+"""
+from typing import List, Tuple, Dict, Any
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import queue
+import random
+import signal
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+MODES = ('backtrack', 'dlx', 'parallel')
+
+
+def generate(seed, rows, cols, obstacle_density=0.02, max_size=None, keep=0.8) -> Dict[str, Any]:
+    """
+    Solvable board by construction. Rectangles are cut in two at a random line, or a square is cut
+    off their end, until each piece is a square that holds no obstacle. A free square piece of at
+    most max_size (half the board by default) is kept whole with probability keep, a 1x1 always.
+    """
+    rng = random.Random(seed)
+    max_size = max_size or max(2, min(rows, cols) // 2)
+    obstacles = {(r, c) for r in range(rows) for c in range(cols) if rng.random() < obstacle_density}
+    counts = {}
+    pieces = [(0, 0, rows, cols)]
+    while pieces:
+        top, left, height, width = pieces.pop()
+        blocked = any((r, c) in obstacles for r in range(top, top + height) for c in range(left, left + width))
+        if height == width and not blocked and height <= max_size and (height == 1 or rng.random() < keep):
+            counts[height] = counts.get(height, 0) + 1
+            continue
+        if height == width == 1:
+            continue  #obstacle cell
+        #cut across the longer side, mostly a square off the end, random cuts leave strips of 1x1s
+        if height > width or (height == width and rng.random() < 0.5):
+            cut = width if height > width and rng.random() < 0.8 else rng.randint(1, height - 1)
+            pieces += [(top, left, cut, width), (top + cut, left, height - cut, width)]
+        else:
+            cut = height if width > height and rng.random() < 0.8 else rng.randint(1, width - 1)
+            pieces += [(top, left, height, cut), (top, left + cut, height, width - cut)]
+    return {
+        'rows': rows,
+        'cols': cols,
+        'input_squares': dict(sorted(counts.items(), reverse=True)),
+        'obstacles': sorted(obstacles),
+    }
+
+
+def largest_free_square(dct) -> int:
+    """Side of the largest square without obstacles that fits on the board."""
+    obstacles = set(map(tuple, dct['obstacles']))
+    best = 0
+    above = [0] * (dct['cols'] + 1)
+    for r in range(dct['rows']):
+        current = [0] * (dct['cols'] + 1)
+        for c in range(dct['cols']):
+            if (r, c) not in obstacles:
+                current[c + 1] = 1 + min(above[c], above[c + 1], current[c])
+                best = max(best, current[c + 1])
+        above = current
+    return best
+
+
+def single_cells(dct) -> int:
+    """Free cells that no 2x2 block without obstacles covers, only a 1x1 square fits there."""
+    rows, cols = dct['rows'], dct['cols']
+    obstacles = set(map(tuple, dct['obstacles']))
+    covered = set()
+    for r in range(rows - 1):
+        for c in range(cols - 1):
+            block = [(r, c), (r + 1, c), (r, c + 1), (r + 1, c + 1)]
+            if not any(cell in obstacles for cell in block):
+                covered.update(block)
+    return rows * cols - len(obstacles) - len(covered)
+
+
+def near_misses(dct) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    (variant, board) pairs with the same board and free area but no packing:
+    'starved' merges groups of four 1x1 squares into 2x2 squares until fewer 1x1 squares are left
+    than single_cells needs, 'too_big' trades 1x1 squares for one square that fits nowhere.
+    A variant is left out when there are not enough 1x1 squares for it (e.g. 'too_big' on an
+    obstacle-free board, where nothing is too big) or no single cells to starve.
+    """
+    result = []
+    ones = dct['input_squares'].get(1, 0)
+    needed = single_cells(dct)
+    left = needed - 1 - (needed - 1 - ones) % 4  #most 1x1 squares that can stay, merging a multiple of 4
+    if needed and 0 <= left < ones:
+        squares = dict(dct['input_squares'])
+        squares[1] = left
+        squares[2] = squares.get(2, 0) + (ones - left) // 4
+        result.append(('starved', dict(dct, input_squares=dict(sorted(squares.items(), reverse=True)))))
+    size = largest_free_square(dct) + 1
+    if ones >= size * size:
+        squares = dict(dct['input_squares'])
+        squares[1] -= size * size
+        squares[size] = squares.get(size, 0) + 1
+        result.append(('too_big', dict(dct, input_squares=dict(sorted(squares.items(), reverse=True)))))
+    return result
+
+
+def check(dct, solution) -> bool:
+    """True if the squares cover every free cell exactly once and use exactly the given counts."""
+    rows, cols = dct['rows'], dct['cols']
+    obstacles = set(map(tuple, dct['obstacles']))
+    covered = set()
+    counts = {}
+    for size, row, col in solution:
+        counts[size] = counts.get(size, 0) + 1
+        for r in range(row, row + size):
+            for c in range(col, col + size):
+                if not (0 <= r < rows and 0 <= c < cols) or (r, c) in obstacles or (r, c) in covered:
+                    return False
+                covered.add((r, c))
+    return ({size: count for size, count in counts.items()} == {size: count for size, count in dct['input_squares'].items() if count}
+            and len(covered) + len(obstacles) == rows * cols)
+
+
+def load_solver(path):
+    """The --solver module, executed from its path: 'Project 2.2 Part 2.py' has spaces in its name."""
+    spec = importlib.util.spec_from_file_location('solver', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+#forked child of run_one: solve dct in one mode and put (found, legal, error, seconds, COUNTERS)
+def _worker(solver, dct, mode, workers, results):
+    #session leader, run_one's killpg then also reaches the workers solve_parallel forks from here
+    os.setsid()
+    args = (dct['rows'], dct['cols'], dct['input_squares'], dct['obstacles'])
+    counts = {}
+    start_time = time.perf_counter()
+    try:
+        if mode == 'parallel':
+            solution = solver.solve_parallel(*args, workers, counters=counts)
+        else:
+            engine = solver.ExactCover(*args) if mode == 'dlx' else solver.CSP(*args)
+            solution = engine.solve()
+            #DLX has no transposition table, so no cache counters
+            counts = {name: getattr(engine, name) for name in solver.COUNTERS if hasattr(engine, name)}
+        error = None
+    except Exception as e:
+        solution = []
+        error = f'{type(e).__name__}: {e}'
+    elapsed = time.perf_counter() - start_time
+    results.put((bool(solution), bool(solution) and check(dct, solution), error, elapsed, counts))
+
+
+def run_one(solver, dct, mode, timeout=None, workers=2) -> Dict[str, Any]:
+    """Solve one board in a forked process and kill it after timeout seconds."""
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    #the parallel mode forks from this process, and multiprocessing forbids that inside a daemon
+    process = context.Process(target=_worker, args=(solver, dct, mode, workers, results))
+    process.start()
+    try:
+        found, legal, error, elapsed, counts = results.get(timeout=timeout)
+    except queue.Empty:
+        found, legal, error, elapsed, counts = False, None, 'timeout', timeout, {}
+    finally:
+        if process.is_alive():
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        process.join()
+    return {
+        'found': found,
+        'legal': legal,
+        'error': error,
+        'time': round(elapsed, 6),
+        'nodes': counts.get('nodes'),
+        'backtracks': counts.get('backtracks'),
+        'cache_hits': counts.get('cache_hits'),
+        'cache_probes': counts.get('cache_probes'),
+        'cache_hit_rate': round(counts['cache_hits'] / counts['cache_probes'], 6) if counts.get('cache_probes') else None,
+    }
+
+
+def boards(args) -> List[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+    """(kind, parameters, board) for every size and seed, plus near misses if asked for."""
+    result = []
+    for size in args.sizes:
+        for seed in range(args.seed, args.seed + args.instances):
+            params = {'rows': size, 'cols': size, 'seed': seed, 'obstacle_density': args.obstacle_density}
+            dct = generate(seed, size, size, args.obstacle_density)
+            result.append(('solvable', params, dct))
+            if args.near_miss:
+                for variant, board in near_misses(dct):
+                    result.append(('near_miss', dict(params, variant=variant), board))
+    return result
+
+
+def summarise(results) -> Dict[str, Any]:
+    summary = {}
+    for res in results:
+        entry = summary.setdefault(res['mode'], {
+            'runs': 0, 'found': 0, 'illegal': 0, 'timeouts': 0, 'errors': 0,
+            'missed_solvable': 0, 'refuted': 0, 'total_time': 0.0, 'total_nodes': 0,
+            'cache_hits': 0, 'cache_probes': 0})
+        entry['runs'] += 1
+        entry['found'] += res['found']
+        entry['illegal'] += res['found'] and not res['legal']
+        entry['timeouts'] += res['error'] == 'timeout'
+        entry['errors'] += res['error'] not in (None, 'timeout')
+        #a solvable board reported as unsolvable is a solver bug, a timeout is not
+        entry['missed_solvable'] += res['kind'] == 'solvable' and not res['found'] and res['error'] is None
+        entry['refuted'] += res['kind'] == 'near_miss' and not res['found'] and res['error'] is None
+        entry['total_time'] += res['time'] or 0.0
+        entry['total_nodes'] += res['nodes'] or 0
+        entry['cache_hits'] += res['cache_hits'] or 0
+        entry['cache_probes'] += res['cache_probes'] or 0
+    for entry in summary.values():
+        entry['total_time'] = round(entry['total_time'], 6)
+        entry['cache_hit_rate'] = round(entry['cache_hits'] / entry['cache_probes'], 6) if entry['cache_probes'] else None
+    return summary
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    solver = load_solver(args.solver)
+    results = []
+    for kind, params, dct in boards(args):
+        for mode in args.modes:
+            res = run_one(solver, dct, mode, args.timeout, args.workers)
+            results.append({'kind': kind, 'params': params, 'mode': mode,
+                            'squares': sum(dct['input_squares'].values()), **res})
+            if args.verbose:
+                print(kind, params, mode, res['time'], res['nodes'], res['error'] or '', file=sys.stderr)
+    return {'results': results, 'summary': summarise(results)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--solver', default=os.path.join(HERE, 'Project 2.2 Part 2.py'), help='solver file to benchmark')
+    parser.add_argument('--modes', nargs='*', default=['backtrack', 'dlx'], choices=MODES)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[8, 12, 16, 24, 32, 48, 64, 100], help='board side lengths')
+    parser.add_argument('--instances', type=int, default=3, help='seeds per size')
+    parser.add_argument('--seed', type=int, default=0, help='first seed')
+    parser.add_argument('--obstacle-density', type=float, default=0.02)
+    parser.add_argument('--near-miss', action='store_true', help='also run the near-miss variant of every board')
+    parser.add_argument('--workers', type=int, default=2, help='workers for the parallel mode')
+    parser.add_argument('--timeout', type=float, default=30.0, help='seconds per solve')
+    parser.add_argument('--out', default=None, help='write the JSON report here instead of stdout')
+    parser.add_argument('--verbose', action='store_true', help='print every run to stderr')
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args)
+    report['config'] = {key: value for key, value in vars(args).items() if key not in ('out', 'verbose')}
+
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()